@@ -6,12 +6,27 @@ pub async fn execute(
     client: &mut ClawpotServiceClient<Channel>,
     vcpus: Option<u32>,
     memory: Option<u32>,
+    format: &str,
 ) -> Result<()> {
     let request = CreateVmRequest {
         vcpu_count: vcpus,
         mem_size_mib: memory,
     };
 
+    if format == "json" {
+        // Machine-readable: a single JSON object and nothing else on stdout
+        let vm_info = client.create_vm(request).await?.into_inner();
+        println!(
+            "{}",
+            serde_json::json!({
+                "vm_id": vm_info.vm_id,
+                "ip_address": vm_info.ip_address,
+                "socket_path": vm_info.socket_path,
+            })
+        );
+        return Ok(());
+    }
+
     println!("Creating VM...");
 
     let response = client.create_vm(request).await?;
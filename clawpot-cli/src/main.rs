@@ -29,6 +29,10 @@ enum Commands {
         /// Memory in MiB (default: 256)
         #[arg(long)]
         memory: Option<u32>,
+
+        /// Output format: text (default) or json
+        #[arg(long, default_value = "text")]
+        format: String,
     },
 
     /// Delete a VM
@@ -165,8 +169,12 @@ async fn main() -> Result<()> {
 
     // Execute command
     match cli.command {
-        Commands::Create { vcpus, memory } => {
-            commands::create::execute(&mut client, vcpus, memory).await?;
+        Commands::Create {
+            vcpus,
+            memory,
+            format,
+        } => {
+            commands::create::execute(&mut client, vcpus, memory, &format).await?;
         }
         Commands::Delete { vm_id } => {
             commands::delete::execute(&mut client, vm_id).await?;
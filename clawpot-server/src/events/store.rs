@@ -147,6 +147,8 @@ impl EventStore {
                 data            TEXT NOT NULL DEFAULT '{}'
             );
 
+            CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started_at);
+
             CREATE INDEX IF NOT EXISTS idx_events_session ON events(session_id);
             CREATE INDEX IF NOT EXISTS idx_events_ts ON events(timestamp);
             CREATE INDEX IF NOT EXISTS idx_events_vm ON events(vm_id);
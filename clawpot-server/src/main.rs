@@ -74,6 +74,17 @@ async fn main() -> Result<()> {
     )
     .context("Failed to initialize event store")?;
 
+    // Publish the session ID next to the DB so clients (e.g. the integration
+    // tests) can find it without querying the sessions table.
+    let session_file = events_db_path.with_file_name("current_session");
+    if let Err(e) = std::fs::write(&session_file, &session_id) {
+        warn!(
+            "Failed to write session ID to {}: {}",
+            session_file.display(),
+            e
+        );
+    }
+
     clawpot_event!(event_store, "server.started", "server", {
         "version": env!("CARGO_PKG_VERSION"),
         "pid": std::process::id(),
@@ -0,0 +1,245 @@
+"""
+Shared paths, environment and helpers for the Clawpot integration tests.
+
+Imported by conftest.py and the test modules so these are computed once per
+session instead of once per importing file.
+"""
+
+import functools
+import logging
+import os
+import selectors
+import shutil
+import socket
+import subprocess
+import textwrap
+import time
+
+# ---------------------------------------------------------------------------
+# Paths and environment
+# ---------------------------------------------------------------------------
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# Point CLAWPOT_CARGO_TARGET at a tmpfs (e.g. /dev/shm/clawpot-target) to keep
+# build I/O off slow disks. Defaults to the workspace target/ used by CI.
+CARGO_TARGET_DIR = os.environ.get("CLAWPOT_CARGO_TARGET", os.path.join(PROJECT_ROOT, "target"))
+# Cargo profile the server and CLI are built and run with. CI ships debug
+# binaries; CLAWPOT_TEST_PROFILE=release trades a slower build for faster
+# binaries on local runs.
+BUILD_PROFILE = os.environ.get("CLAWPOT_TEST_PROFILE", "debug")
+if BUILD_PROFILE not in ("debug", "release"):
+    raise ValueError(f"CLAWPOT_TEST_PROFILE must be debug or release, not {BUILD_PROFILE!r}")
+CLI_BIN = os.path.join(CARGO_TARGET_DIR, BUILD_PROFILE, "clawpot")
+SERVER_BIN = os.path.join(CARGO_TARGET_DIR, BUILD_PROFILE, "clawpot-server")
+# Encoded once so cli() doesn't re-encode the binary path on every call
+_CLI_BIN_B = os.fsencode(CLI_BIN)
+
+# Inputs whose changes require rebuilding the server/CLI binaries
+RUST_SOURCES = (
+    "Cargo.toml",
+    "Cargo.lock",
+    "clawpot-common",
+    "clawpot-server",
+    "clawpot-cli",
+    "proto",
+)
+
+
+@functools.cache
+def server_env() -> dict[str, str]:
+    """Environment for cargo and clawpot-server, built on first use.
+
+    Computed lazily so collection-only runs (e.g. IDE test discovery) don't
+    copy os.environ or probe the filesystem for tool dirs and sccache.
+    """
+    # User-local tool dirs (cargo, uv) prepended to PATH
+    home_bins = (os.path.expanduser("~/.cargo/bin"), os.path.expanduser("~/.local/bin"))
+    dirs = [p for p in home_bins if os.path.isdir(p)]
+    path = os.pathsep.join(filter(None, (*dirs, os.environ.get("PATH", ""))))
+    env = {
+        **os.environ,
+        "CLAWPOT_ROOT": PROJECT_ROOT,
+        "CARGO_TARGET_DIR": CARGO_TARGET_DIR,
+        "PATH": path,
+    }
+    if "RUSTC_WRAPPER" not in env and shutil.which("sccache", path=path):
+        env["RUSTC_WRAPPER"] = "sccache"
+    return env
+
+
+def events_db_path() -> str:
+    """Resolve the events DB path from CLAWPOT_EVENTS_DB or CLAWPOT_ROOT."""
+    path = os.environ.get("CLAWPOT_EVENTS_DB")
+    if path:
+        return path
+    root = os.environ.get("CLAWPOT_ROOT", PROJECT_ROOT)
+    return os.path.join(root, "data", "events.db")
+
+
+# gRPC listen address of clawpot-server (bound on 0.0.0.0:50051)
+SERVER_ADDR = ("127.0.0.1", 50051)
+# Logged by clawpot-server right before it binds the gRPC listener
+SERVER_READY_MARKER = b"Starting gRPC server on"
+# Readiness retry delay: starts small so a fast startup is noticed quickly,
+# then backs off so a slow one isn't probed needlessly often.
+RETRY_DELAY_START = 0.01
+RETRY_DELAY_MAX = 0.1
+
+# Set to 1 to run against a clawpot-server that is already listening (e.g. one
+# left running across a dev loop) instead of building and spawning one.
+REUSE_SERVER = os.environ.get("CLAWPOT_TEST_REUSE_SERVER") == "1"
+
+# Lines of CLI output logged per stream; the rest is summarised in one line
+CLI_LOG_MAX_LINES = 32
+
+log = logging.getLogger("clawpot-test")
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _log_output(name: str, output: bytes, level: int) -> None:
+    """Log one CLI output stream as a single indented record.
+
+    Only the first CLI_LOG_MAX_LINES lines are decoded; the rest is counted
+    without being split or decoded.
+    """
+    output = output.strip()
+    if not output:
+        return
+    end = -1
+    for _ in range(CLI_LOG_MAX_LINES):
+        end = output.find(b"\n", end + 1)
+        if end < 0:
+            break
+    head = output if end < 0 else output[:end]
+    text = textwrap.indent(head.decode("utf-8", errors="replace"), "    ")
+    if end >= 0:
+        remaining = output.count(b"\n", end)
+        text += f"\n    ... ({remaining} more lines)"
+    log.log(level, "  %s (%d bytes):\n%s", name, len(output), text)
+
+
+def cli(*args: str, timeout: float = 60) -> tuple[bytes, bytes, int]:
+    """Run the clawpot CLI and return (stdout, stderr, exit_code).
+
+    Output is returned as raw bytes; callers mostly check for substrings, so
+    decoding is only done here when the lines are actually going to be logged.
+    """
+    log.info("CLI: %s %s", CLI_BIN, " ".join(args))
+
+    # CPython launches this via posix_spawn rather than fork+exec as long as
+    # the binary path has a directory part and there is no cwd, preexec_fn,
+    # pass_fds or close_fds=True; keep it that way. Python's own fds are
+    # non-inheritable, so the CLI still only gets its stdio pipes.
+    result = subprocess.run(
+        (_CLI_BIN_B, *args),
+        capture_output=True,
+        timeout=timeout,
+        close_fds=False,
+    )
+
+    log.info("  exit_code=%d", result.returncode)
+    if log.isEnabledFor(logging.INFO):
+        _log_output("stdout", result.stdout, logging.INFO)
+    if log.isEnabledFor(logging.WARNING):
+        _log_output("stderr", result.stderr, logging.WARNING)
+
+    return result.stdout, result.stderr, result.returncode
+
+
+def can_connect() -> bool:
+    """Return True if the server's gRPC port accepts a TCP connection."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(1)
+        return sock.connect_ex(SERVER_ADDR) == 0
+
+
+def _tail_server_log(proc: subprocess.Popen, log_path: str, max_wait: float) -> None:
+    """Follow the server's own log until it reports the gRPC listener.
+
+    The marker is logged just before the listener binds, so readiness is still
+    confirmed with a connect once it shows up.
+    """
+    deadline = time.monotonic() + max_wait
+    delay = RETRY_DELAY_START
+    seen = b""
+    with open(log_path, "rb") as f:
+        while time.monotonic() < deadline:
+            if proc.poll() is not None:
+                raise RuntimeError(f"Server exited during startup (code {proc.returncode})")
+            if SERVER_READY_MARKER not in seen:
+                # Keep a marker-sized tail so a line split across reads still matches
+                seen = seen[-len(SERVER_READY_MARKER) :] + f.read()
+            if SERVER_READY_MARKER in seen and can_connect():
+                log.info("Server is ready")
+                return
+            time.sleep(delay)
+            delay = min(delay * 1.5, RETRY_DELAY_MAX)
+    raise RuntimeError(f"Server did not become ready within {max_wait}s")
+
+
+def wait_for_server(proc: subprocess.Popen, log_path: str, max_wait: float = 15) -> None:
+    """Wait until the server accepts connections on its gRPC port.
+
+    A pidfd for the server process is watched alongside the connect attempt,
+    so a crash during startup is reported immediately rather than after the
+    full timeout. Falls back to following the server log where pidfd_open is
+    missing.
+    """
+    try:
+        pidfd = os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):
+        _tail_server_log(proc, log_path, max_wait)
+        return
+
+    deadline = time.monotonic() + max_wait
+    delay = RETRY_DELAY_START
+    try:
+        with selectors.DefaultSelector() as sel:
+            sel.register(pidfd, selectors.EVENT_READ, "exited")
+            while (remaining := deadline - time.monotonic()) > 0:
+                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                    sock.setblocking(False)
+                    sock.connect_ex(SERVER_ADDR)
+                    sel.register(sock, selectors.EVENT_WRITE, "connect")
+                    ready = {key.data for key, _ in sel.select(timeout=remaining)}
+                    sel.unregister(sock)
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+
+                if "exited" in ready:
+                    raise RuntimeError(f"Server exited during startup (code {proc.wait()})")
+                if "connect" in ready and err == 0:
+                    log.info("Server is ready")
+                    return
+                # Connection refused: the port isn't bound yet. Back off on the
+                # pidfd alone so an exit still wakes us up straight away.
+                if sel.select(timeout=min(delay, max(deadline - time.monotonic(), 0))):
+                    raise RuntimeError(f"Server exited during startup (code {proc.wait()})")
+                delay = min(delay * 1.5, RETRY_DELAY_MAX)
+    finally:
+        os.close(pidfd)
+    raise RuntimeError(f"Server did not become ready within {max_wait}s")
+
+
+def wait_for_exit(proc: subprocess.Popen, timeout: float) -> int:
+    """Wait for proc to exit and return its exit code.
+
+    Blocks on a pidfd instead of Popen.wait(timeout)'s sleep-and-poll loop,
+    so shutdown is noticed the moment it happens. Raises
+    subprocess.TimeoutExpired like Popen.wait() does.
+    """
+    try:
+        pidfd = os.pidfd_open(proc.pid)
+    except (AttributeError, OSError):
+        return proc.wait(timeout=timeout)
+    try:
+        with selectors.DefaultSelector() as sel:
+            sel.register(pidfd, selectors.EVENT_READ)
+            if not sel.select(timeout=timeout):
+                raise subprocess.TimeoutExpired(proc.args, timeout)
+    finally:
+        os.close(pidfd)
+    return proc.wait()
@@ -0,0 +1,72 @@
+"""
+Python gRPC client for clawpot-server, used by the integration tests.
+
+Stubs are generated from proto/clawpot.proto at session start (via
+grpc_tools.protoc), so there is no checked-in generated code to keep in sync
+with the Rust side. A single channel is reused for every call, which avoids
+spawning the CLI binary (and re-dialing gRPC) once per test step.
+"""
+
+import importlib
+import logging
+import os
+import sys
+
+import grpc
+from grpc_tools import protoc
+
+PROTO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "proto"))
+SERVER_TARGET = "127.0.0.1:50051"
+
+log = logging.getLogger("clawpot-grpc")
+
+
+def generate_stubs(out_dir: str):
+    """Compile clawpot.proto into out_dir and return the (pb2, pb2_grpc) modules."""
+    rc = protoc.main(
+        [
+            "grpc_tools.protoc",
+            f"--proto_path={PROTO_DIR}",
+            f"--python_out={out_dir}",
+            f"--grpc_python_out={out_dir}",
+            os.path.join(PROTO_DIR, "clawpot.proto"),
+        ]
+    )
+    if rc != 0:
+        raise RuntimeError(f"protoc failed with exit code {rc}")
+    sys.path.insert(0, out_dir)
+    return importlib.import_module("clawpot_pb2"), importlib.import_module("clawpot_pb2_grpc")
+
+
+class ClawpotClient:
+    """Thin wrapper around one long-lived gRPC channel to clawpot-server."""
+
+    def __init__(self, pb2, pb2_grpc, target: str = SERVER_TARGET):
+        self.pb2 = pb2
+        self._channel = grpc.insecure_channel(target)
+        self._stub = pb2_grpc.ClawpotServiceStub(self._channel)
+
+    def list_vms(self, timeout: float = 30):
+        """Return the list of VmInfo messages for all VMs."""
+        log.info("gRPC: ListVMs")
+        vms = self._stub.ListVMs(self.pb2.ListVmsRequest(), timeout=timeout).vms
+        log.info("  %d VM(s)", len(vms))
+        return vms
+
+    def exec_vm(self, vm_id: str, argv: list[str], timeout: float = 60):
+        """Run argv inside the VM and return the ExecVmResponse."""
+        log.info("gRPC: ExecVM %s -- %s", vm_id, " ".join(argv))
+        resp = self._stub.ExecVM(
+            self.pb2.ExecVmRequest(vm_id=vm_id, command=argv[0], args=argv[1:]),
+            timeout=timeout,
+        )
+        log.info(
+            "  exit_code=%d stdout=%d bytes stderr=%d bytes",
+            resp.exit_code,
+            len(resp.stdout),
+            len(resp.stderr),
+        )
+        return resp
+
+    def close(self):
+        self._channel.close()
@@ -3,9 +3,11 @@ Pytest configuration for Clawpot integration tests.
 
 Provides:
   - Session-scoped `server` fixture that starts/stops clawpot-server
+  - Session-scoped `client` fixture: a gRPC client reused by all tests
   - EventLogPlugin that writes test lifecycle events to the events database
 """
 
+import atexit
 import json
 import logging
 import os
@@ -13,50 +15,96 @@ import signal
 import sqlite3
 import subprocess
 import time
+import weakref
 from datetime import datetime, timezone
 
 import pytest
 
-# ---------------------------------------------------------------------------
-# Shared paths and helpers
-# ---------------------------------------------------------------------------
-
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-CLI_BIN = os.path.join(PROJECT_ROOT, "target", "debug", "clawpot")
-SERVER_BIN = os.path.join(PROJECT_ROOT, "target", "debug", "clawpot-server")
-
-SERVER_ENV = {
-    **os.environ,
-    "CLAWPOT_ROOT": PROJECT_ROOT,
-    "PATH": (
-        os.path.expanduser("~/.cargo/bin")
-        + ":"
-        + os.path.expanduser("~/.local/bin")
-        + ":"
-        + os.environ.get("PATH", "")
-    ),
-}
+from _common import (
+    BUILD_PROFILE,
+    CLI_BIN,
+    PROJECT_ROOT,
+    REUSE_SERVER,
+    RUST_SOURCES,
+    SERVER_BIN,
+    can_connect,
+    cli,
+    events_db_path,
+    server_env,
+    wait_for_exit,
+    wait_for_server,
+)
+from clawpot_client import ClawpotClient, generate_stubs
 
 log = logging.getLogger("clawpot-test")
 
+# Servers that have been started but not yet torn down. The atexit hook below
+# stops anything left here if the session ends without running finalizers.
+_live_servers = weakref.WeakSet()
+
+
+def _stop_server(proc: subprocess.Popen, timeout: float) -> None:
+    """SIGTERM the server, escalating to SIGKILL if it doesn't exit in time."""
+    proc.send_signal(signal.SIGTERM)
+    try:
+        wait_for_exit(proc, timeout)
+        log.info("Server exited cleanly")
+    except subprocess.TimeoutExpired:
+        log.warning("Server did not exit, killing...")
+        proc.kill()
+        proc.wait()
+
+
+@atexit.register
+def _stop_leftover_servers() -> None:
+    """Last-resort cleanup so an interrupted run never orphans clawpot-server."""
+    for proc in list(_live_servers):
+        if proc.poll() is None:
+            _stop_server(proc, timeout=5)
+
 
-def _wait_for_server(max_wait: float = 15) -> None:
-    """Poll the server until it responds to 'list'."""
-    deadline = time.monotonic() + max_wait
-    while time.monotonic() < deadline:
+def _on_sigterm(signum, frame):
+    """Turn SIGTERM into a pytest exit so fixture finalizers still run."""
+    pytest.exit("SIGTERM received", returncode=1)
+
+
+def _source_newer_than(mtime_ns: int) -> bool:
+    """True if any file under RUST_SOURCES was modified after mtime_ns.
+
+    Walks iteratively with os.scandir and stops at the first newer file. The
+    CI tarball ships pre-built binaries without the crate sources, so there is
+    nothing to compare against there.
+    """
+    if not os.path.isdir(os.path.join(PROJECT_ROOT, "clawpot-server")):
+        return False
+    stack = [os.path.join(PROJECT_ROOT, name) for name in RUST_SOURCES]
+    while stack:
+        path = stack.pop()
         try:
-            result = subprocess.run(
-                [CLI_BIN, "list"],
-                capture_output=True,
-                timeout=5,
-            )
-            if result.returncode == 0:
-                log.info("Server is ready")
-                return
-        except (subprocess.TimeoutExpired, OSError):
-            pass
-        time.sleep(0.5)
-    raise RuntimeError(f"Server did not become ready within {max_wait}s")
+            entries = os.scandir(path)
+        except NotADirectoryError:
+            # Top-level files such as Cargo.toml
+            if os.stat(path).st_mtime_ns > mtime_ns:
+                return True
+            continue
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.stat(follow_symlinks=False).st_mtime_ns > mtime_ns:
+                    return True
+    return False
+
+
+def _binaries_up_to_date() -> bool:
+    """True if both binaries exist and are newer than every Rust source."""
+    try:
+        built = min(os.stat(SERVER_BIN).st_mtime_ns, os.stat(CLI_BIN).st_mtime_ns)
+    except FileNotFoundError:
+        return False
+    return not _source_newer_than(built)
 
 
 # ---------------------------------------------------------------------------
@@ -67,20 +115,28 @@ def _wait_for_server(max_wait: float = 15) -> None:
 @pytest.fixture(scope="session", autouse=True)
 def server():
     """Start the clawpot-server for the entire test session."""
+    if REUSE_SERVER:
+        if not can_connect():
+            pytest.fail("CLAWPOT_TEST_REUSE_SERVER=1 but no server is listening on port 50051")
+        log.info("Reusing the running clawpot-server (CLAWPOT_TEST_REUSE_SERVER=1)")
+        yield None
+        return
+
     log.info("=" * 60)
     log.info("STARTING SERVER")
     log.info("=" * 60)
 
-    # Build server + CLI if not already present (e.g. pre-built in CI)
-    if os.path.isfile(SERVER_BIN) and os.path.isfile(CLI_BIN):
-        log.info("Pre-built binaries found, skipping cargo build")
+    # Build server + CLI unless they are already up to date (e.g. pre-built in CI)
+    if _binaries_up_to_date():
+        log.info("Pre-built binaries are up to date, skipping cargo build")
     else:
         log.info("Building server and CLI...")
+        release = ["--release"] if BUILD_PROFILE == "release" else []
         build = subprocess.run(
-            ["cargo", "build", "-p", "clawpot-server", "-p", "clawpot-cli"],
+            ["cargo", "build", *release, "-p", "clawpot-server", "-p", "clawpot-cli"],
             capture_output=True,
             cwd=PROJECT_ROOT,
-            env=SERVER_ENV,
+            env=server_env(),
             timeout=120,
         )
         if build.returncode != 0:
@@ -88,26 +144,26 @@ def server():
             pytest.fail("cargo build failed")
 
         log.info("Build succeeded")
-
-    assert os.path.isfile(SERVER_BIN), f"Server binary not found: {SERVER_BIN}"
-    assert os.path.isfile(CLI_BIN), f"CLI binary not found: {CLI_BIN}"
+        assert os.path.isfile(SERVER_BIN), f"Server binary not found: {SERVER_BIN}"
+        assert os.path.isfile(CLI_BIN), f"CLI binary not found: {CLI_BIN}"
 
     # Start server
     log.info("Starting clawpot-server (pid will follow)...")
-    server_log = open(  # noqa: SIM115
-        os.path.join(PROJECT_ROOT, "target", "server-test.log"), "w"
-    )
+    server_log_path = os.path.join(PROJECT_ROOT, "target", "server-test.log")
+    os.makedirs(os.path.dirname(server_log_path), exist_ok=True)
+    server_log = open(server_log_path, "w")  # noqa: SIM115
     proc = subprocess.Popen(
         [SERVER_BIN],
-        env=SERVER_ENV,
+        env=server_env(),
         stdout=server_log,
         stderr=subprocess.STDOUT,
     )
+    _live_servers.add(proc)
     log.info("Server started with PID %d", proc.pid)
 
     # Wait for it to be ready
     try:
-        _wait_for_server()
+        wait_for_server(proc, server_log_path)
     except RuntimeError:
         proc.kill()
         proc.wait()
@@ -121,41 +177,79 @@ def server():
     log.info("STOPPING SERVER (PID %d)", proc.pid)
     log.info("=" * 60)
 
-    proc.send_signal(signal.SIGTERM)
-    try:
-        proc.wait(timeout=10)
-        log.info("Server exited cleanly")
-    except subprocess.TimeoutExpired:
-        log.warning("Server did not exit, killing...")
-        proc.kill()
-        proc.wait()
+    _stop_server(proc, timeout=10)
+    _live_servers.discard(proc)
     server_log.close()
 
 
-def _events_db_path():
-    """Resolve the events DB path from CLAWPOT_EVENTS_DB or CLAWPOT_ROOT."""
-    path = os.environ.get("CLAWPOT_EVENTS_DB")
-    if path:
-        return path
-    root = os.environ.get(
-        "CLAWPOT_ROOT",
-        os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")),
-    )
-    return os.path.join(root, "data", "events.db")
+@pytest.fixture(scope="session")
+def client(server, tmp_path_factory):
+    """gRPC client on one reused channel, so tests don't spawn the CLI per call."""
+    pb2, pb2_grpc = generate_stubs(str(tmp_path_factory.mktemp("grpc_stubs")))
+    grpc_client = ClawpotClient(pb2, pb2_grpc)
+    yield grpc_client
+    grpc_client.close()
+
+
+@pytest.fixture(scope="session")
+def vm_id(client):
+    """ID of one VM shared by every test module, created through the CLI on first use.
+
+    Booting a Firecracker VM is the slowest step in the suite, and no test
+    changes guest state that another depends on, so one VM serves them all.
+    It is deleted through the CLI when the session ends, and the teardown
+    checks that no VMs are left running.
+    """
+    assert not client.list_vms(), "Expected no VMs before creating the shared VM"
+    stdout, _, rc = cli("create", "--vcpus", "1", "--memory", "256", "--format", "json")
+    assert rc == 0, "clawpot create failed"
+    created = json.loads(stdout)
+    assert created["ip_address"], f"No IP address assigned: {created}"
+    log.info("Created shared VM %s (IP %s)", created["vm_id"], created["ip_address"])
+
+    yield created["vm_id"]
+
+    stdout, _, rc = cli("delete", created["vm_id"])
+    assert rc == 0
+    assert b"VM deleted successfully" in stdout
+    assert not client.list_vms(), "Expected no VMs after deleting the shared VM"
+
+
+_EMPTY_JSON = json.dumps({})
+# Pre-rendered payloads for the per-test events, laid out exactly as
+# json.dumps() would; only the test node ID needs escaping.
+_STARTED_JSON = '{{"test_name": {}}}'
+_COMPLETED_JSON = '{{"test_name": {}, "outcome": "{}", "duration_ms": {}}}'
 
 
 def _now_rfc3339():
-    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+    now = datetime.now(timezone.utc)
+    return f"{now:%Y-%m-%dT%H:%M:%S}.{now.microsecond // 1000:03d}Z"
 
 
-def _get_session_id(conn):
-    """Find the most recent active session."""
+def _get_session_id(conn, db_path):
+    """Find the active session.
+
+    clawpot-server writes its session ID to current_session next to the DB;
+    a primary-key lookup confirms it is still running before it is trusted.
+    Falls back to the most recently started session.
+    """
+    try:
+        with open(os.path.join(os.path.dirname(db_path), "current_session")) as f:
+            session_id = f.read().strip()
+    except OSError:
+        session_id = None
+    if session_id:
+        row = conn.execute(
+            "SELECT id FROM sessions WHERE id = ? AND stopped_at IS NULL", (session_id,)
+        ).fetchone()
+        if row:
+            return row[0]
     row = conn.execute("SELECT id FROM sessions ORDER BY started_at DESC LIMIT 1").fetchone()
     return row[0] if row else None
 
 
-def _emit_event(
-    conn,
+def _event_row(
     session_id,
     event_type,
     category,
@@ -164,25 +258,25 @@ def _emit_event(
     duration_ms=None,
     success=None,
     data=None,
+    data_json=None,
 ):
-    """Insert an event row."""
-    conn.execute(
-        """INSERT INTO events (session_id, timestamp, category, event_type,
-                               vm_id, correlation_id, duration_ms, success, data)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            session_id,
-            _now_rfc3339(),
-            category,
-            event_type,
-            vm_id,
-            correlation_id,
-            duration_ms,
-            1 if success is True else (0 if success is False else None),
-            json.dumps(data or {}),
-        ),
+    """Build the parameter tuple for one event row.
+
+    Pass either ``data`` (serialized here) or an already-encoded ``data_json``.
+    """
+    if data_json is None:
+        data_json = json.dumps(data) if data else _EMPTY_JSON
+    return (
+        session_id,
+        _now_rfc3339(),
+        category,
+        event_type,
+        vm_id,
+        correlation_id,
+        duration_ms,
+        1 if success is True else (0 if success is False else None),
+        data_json,
     )
-    conn.commit()
 
 
 class EventLogPlugin:
@@ -190,12 +284,28 @@ class EventLogPlugin:
 
     Connection is lazy: we try to connect on the first test setup, after
     session-scoped fixtures (like the server fixture) have already started.
+
+    Rows are buffered in memory and written in one transaction once
+    FLUSH_EVERY rows or FLUSH_INTERVAL seconds have accumulated, and at session
+    end, so a whole run costs a handful of fsyncs instead of one per event.
+    Each row carries its emit-time timestamp, so late writes don't reorder
+    the timeline.
     """
 
+    FLUSH_EVERY = 64
+    FLUSH_INTERVAL = 5.0
+
+    _INSERT_SQL = """INSERT INTO events (session_id, timestamp, category, event_type,
+                                         vm_id, correlation_id, duration_ms, success, data)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
     def __init__(self):
         self.conn = None
         self.session_id = None
-        self._test_starts = {}
+        # Tests run one at a time in this process, so one start time suffices
+        self._test_start = None
+        self._pending = []
+        self._last_flush = time.monotonic()
         self._connect_attempted = False
 
     def _ensure_connected(self):
@@ -208,7 +318,7 @@ class EventLogPlugin:
             return True
         if self._connect_attempted:
             return False
-        db_path = _events_db_path()
+        db_path = events_db_path()
         if not os.path.exists(db_path):
             # DB doesn't exist yet — fixtures may not have started.
             # Don't set _connect_attempted so we retry on the next test.
@@ -216,9 +326,15 @@ class EventLogPlugin:
         # DB file exists — this is our one real attempt.
         self._connect_attempted = True
         try:
-            self.conn = sqlite3.connect(db_path)
+            # Autocommit mode: transactions are opened explicitly in _flush(),
+            # so the sqlite3 module never starts an implicit deferred one.
+            self.conn = sqlite3.connect(db_path, isolation_level=None)
             self.conn.execute("PRAGMA busy_timeout=5000")
-            self.session_id = _get_session_id(self.conn)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.execute("PRAGMA cache_size=-8000")
+            self.session_id = _get_session_id(self.conn, db_path)
             if self.session_id is None:
                 self.conn.close()
                 self.conn = None
@@ -228,46 +344,65 @@ class EventLogPlugin:
             self.conn = None
             return False
 
+    def _emit(self, event_type, category, **kwargs):
+        """Queue an event row, flushing once the batch is full."""
+        self._pending.append(_event_row(self.session_id, event_type, category, **kwargs))
+        if (
+            len(self._pending) >= self.FLUSH_EVERY
+            or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL
+        ):
+            self._flush()
+
+    def _flush(self):
+        """Write all queued rows in a single transaction."""
+        if not self._pending:
+            return
+        # IMMEDIATE takes the write lock up front (waiting up to busy_timeout)
+        # rather than failing on lock upgrade halfway through the batch.
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(self._INSERT_SQL, self._pending)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        self._pending.clear()
+        self._last_flush = time.monotonic()
+
     @pytest.hookimpl(trylast=True)
     def pytest_runtest_setup(self, item):
         if not self._ensure_connected():
             return
-        self._test_starts[item.nodeid] = time.monotonic()
-        _emit_event(
-            self.conn,
-            self.session_id,
+        self._test_start = time.monotonic()
+        self._emit(
             "test.case.started",
             "test",
-            data={"test_name": item.nodeid},
+            data_json=_STARTED_JSON.format(json.dumps(item.nodeid)),
         )
 
     def pytest_runtest_makereport(self, item, call):
         if not self.conn or call.when != "call":
             return
-        start = self._test_starts.pop(item.nodeid, None)
+        start, self._test_start = self._test_start, None
         duration_ms = int((time.monotonic() - start) * 1000) if start else None
         outcome = "passed" if call.excinfo is None else "failed"
-        _emit_event(
-            self.conn,
-            self.session_id,
+        self._emit(
             "test.case.completed",
             "test",
             duration_ms=duration_ms,
             success=call.excinfo is None,
-            data={
-                "test_name": item.nodeid,
-                "outcome": outcome,
-                "duration_ms": duration_ms,
-            },
+            data_json=_COMPLETED_JSON.format(
+                json.dumps(item.nodeid),
+                outcome,
+                "null" if duration_ms is None else duration_ms,
+            ),
         )
 
     def pytest_sessionfinish(self, session, exitstatus):
         if not self.conn:
             return
         passed = session.testscollected - session.testsfailed
-        _emit_event(
-            self.conn,
-            self.session_id,
+        self._emit(
             "test.session.completed",
             "test",
             data={
@@ -276,9 +411,25 @@ class EventLogPlugin:
                 "errors": exitstatus,
             },
         )
+        self.close()
+
+    def close(self):
+        """Flush anything still queued and close the connection (idempotent)."""
+        if not self.conn:
+            return
+        self._flush()
         self.conn.close()
+        self.conn = None
 
 
 def pytest_configure(config):
-    """Register the event log plugin."""
-    config.pluginmanager.register(EventLogPlugin(), "clawpot_event_log")
+    """Register the event log plugin (once, so events are never written twice).
+
+    Also installs a SIGTERM handler: CI runners stop jobs with SIGTERM, which
+    would otherwise kill pytest without tearing down the server fixture.
+    """
+    if not config.pluginmanager.has_plugin("clawpot_event_log"):
+        plugin = EventLogPlugin()
+        config.pluginmanager.register(plugin, "clawpot_event_log")
+        atexit.register(plugin.close)
+    signal.signal(signal.SIGTERM, _on_sigterm)
@@ -1,7 +1,11 @@
 """
 End-to-end integration tests for Clawpot VM orchestration.
 
-These tests exercise the full stack: CLI → gRPC server → Firecracker VM → guest agent.
+These tests exercise the full stack: gRPC server → Firecracker VM → guest agent.
+The shared VM's creation and deletion (the `vm_id` fixture) and one listing
+go through the `clawpot` CLI binary to cover its argument parsing and
+output; the rest reuse a single gRPC channel (the `client` fixture) so each
+step doesn't pay for spawning the CLI.
 They must be run as root (sudo) because Firecracker requires it.
 
 Usage:
@@ -10,19 +14,91 @@ Usage:
 """
 
 import logging
-import os
 import re
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import pytest
+
+from _common import cli
 
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-CLI_BIN = os.path.join(PROJECT_ROOT, "target", "debug", "clawpot")
 
-# Module-level state shared across ordered tests
-_vm_id: str | None = None
+# Read-only commands whose output is all test_04..test_09 check. They run as
+# one guest-side script, so they cost a single ExecVM round trip; each
+# command's output is followed by an "@@probe <name> <exit code>" marker line
+# that _split_probe_output() splits on.
+BATCHED_PROBES = {
+    "echo": "echo 'hello from VM'",
+    "uname": "uname -a",
+    "resolv": "cat /etc/resolv.conf",
+}
+BATCHED_SCRIPT = "; ".join(
+    f"{cmd}; printf '\\n@@probe {name} %d\\n' $?" for name, cmd in BATCHED_PROBES.items()
+)
+_PROBE_MARKER_RE = re.compile(rb"^@@probe (\S+) (\d+)\n", re.MULTILINE)
+
+# These check ExecVM's own exit-code, stderr and argv plumbing, so each needs a
+# real call. They are independent and are issued concurrently (see exec_results).
+EXEC_PROBES = {
+    "exit_code": ["false"],
+    "stderr": ["ls", "/nonexistent_path"],
+    "multiword": ["cat", "/proc/cpuinfo"],
+}
+
+
+# Network probes checked by test_09..test_12, as (bash script, ExecVM timeout).
+# Each mostly waits on its own connect timeout, so they are issued
+# concurrently (see network_results) and cost the slowest probe, not the sum.
+NETWORK_PROBES = {
+    # DNS proxy on the gateway
+    "dns": (
+        "timeout 10 bash -c"
+        " '(echo > /dev/tcp/192.168.100.1/53) 2>/dev/null"
+        " && echo DNS_REACHABLE || echo DNS_UNREACHABLE'",
+        20,
+    ),
+    # Plain HTTP through the Envoy proxy
+    "http": (
+        "timeout 10 bash -c '(echo -e"
+        ' "GET / HTTP/1.1\\r\\nHost: example.com'
+        '\\r\\nConnection: close\\r\\n\\r\\n"'
+        " > /dev/tcp/93.184.216.34/80"
+        " && echo HTTP_OK) || echo HTTP_FAIL'",
+        20,
+    ),
+    # HTTPS through the TLS MITM proxy. curl -k skips cert verification since
+    # this tests the proxy chain, not the CA trust store; --max-time instead of
+    # the timeout command lets curl flush its output before exiting.
+    "https": (
+        "if command -v curl &>/dev/null; then"
+        " curl -4 -k --max-time 15 --connect-timeout 5"
+        " -o /dev/null -w 'HTTP_STATUS=%{http_code}\\n'"
+        " https://example.com 2>&1; echo CURL_EXIT=$?;"
+        " else timeout 12 bash -c"
+        " '(echo > /dev/tcp/example.com/443) 2>/dev/null"
+        " && echo HTTPS_OK || echo HTTPS_FAIL'; fi",
+        30,
+    ),
+    # Anything other than HTTP/HTTPS/DNS (here SSH to an external host) is blocked
+    "port22": (
+        "timeout 5 bash -c"
+        " '(echo > /dev/tcp/8.8.8.8/22) 2>/dev/null"
+        " && echo PORT22_OPEN || echo PORT22_BLOCKED'",
+        15,
+    ),
+}
+
+
+class ProbeResult(NamedTuple):
+    """Output of one command from BATCHED_SCRIPT."""
+
+    stdout: bytes
+    exit_code: int
+
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -40,29 +116,47 @@ log = logging.getLogger("clawpot-e2e")
 # ---------------------------------------------------------------------------
 
 
-def cli(*args: str, timeout: float = 60) -> tuple[str, str, int]:
-    """Run the clawpot CLI and return (stdout, stderr, exit_code)."""
-    cmd = [CLI_BIN, *args]
-    log.info("CLI: %s", " ".join(cmd))
-
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        timeout=timeout,
-    )
-
-    stdout = result.stdout.decode("utf-8", errors="replace")
-    stderr = result.stderr.decode("utf-8", errors="replace")
-
-    log.info("  exit_code=%d", result.returncode)
-    if stdout.strip():
-        for line in stdout.strip().splitlines():
-            log.info("  stdout: %s", line)
-    if stderr.strip():
-        for line in stderr.strip().splitlines():
-            log.warning("  stderr: %s", line)
-
-    return stdout, stderr, result.returncode
+def _split_probe_output(stdout: bytes) -> dict[str, ProbeResult]:
+    """Split BATCHED_SCRIPT output into a ProbeResult per probe name."""
+    results = {}
+    start = 0
+    for match in _PROBE_MARKER_RE.finditer(stdout):
+        results[match[1].decode()] = ProbeResult(stdout[start : match.start()], int(match[2]))
+        start = match.end()
+    return results
+
+
+@pytest.fixture(scope="class")
+def exec_results(client, vm_id):
+    """Run BATCHED_SCRIPT and EXEC_PROBES concurrently, keyed by probe name."""
+    with ThreadPoolExecutor(max_workers=len(EXEC_PROBES) + 1) as pool:
+        batched = pool.submit(client.exec_vm, vm_id, ["bash", "-c", BATCHED_SCRIPT])
+        futures = {
+            name: pool.submit(client.exec_vm, vm_id, argv) for name, argv in EXEC_PROBES.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+    results.update(_split_probe_output(batched.result().stdout))
+    assert BATCHED_PROBES.keys() <= results.keys(), "Batched probe output was truncated"
+    return results
+
+
+@pytest.fixture(scope="class")
+def network_results(client, vm_id):
+    """Run NETWORK_PROBES concurrently against the shared VM, keyed by probe name."""
+    with ThreadPoolExecutor(max_workers=len(NETWORK_PROBES)) as pool:
+        futures = {
+            name: pool.submit(client.exec_vm, vm_id, ["bash", "-c", script], timeout=timeout)
+            for name, (script, timeout) in NETWORK_PROBES.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+    for name, resp in results.items():
+        log.info(
+            "Network probe %s: exit_code=%d, output: %s",
+            name,
+            resp.exit_code,
+            (resp.stdout + resp.stderr).decode("utf-8", errors="replace").strip(),
+        )
+    return results
 
 
 # ---------------------------------------------------------------------------
@@ -73,197 +167,73 @@ def cli(*args: str, timeout: float = 60) -> tuple[str, str, int]:
 class TestE2E:
     """End-to-end test suite. Tests run in order within this class."""
 
-    def test_01_list_empty(self, server):
-        """Initially there should be no VMs."""
-        stdout, _, rc = cli("list")
-        assert rc == 0
-        assert "No VMs running" in stdout
-
-    def test_02_create_vm(self, server):
-        """Create a VM and verify the output."""
-        global _vm_id
-
-        stdout, _, rc = cli("create", "--vcpus", "1", "--memory", "256")
-        assert rc == 0
-        assert "VM created successfully" in stdout
-
-        # Parse VM ID from output: "  VM ID:      <uuid>"
-        match = re.search(r"VM ID:\s+([0-9a-f-]{36})", stdout)
-        assert match, f"Could not parse VM ID from output:\n{stdout}"
-        _vm_id = match.group(1)
-        log.info("Created VM: %s", _vm_id)
-
-        # Parse IP
-        ip_match = re.search(r"IP Address:\s+([\d.]+)", stdout)
-        assert ip_match, "Could not parse IP address"
-        log.info("VM IP: %s", ip_match.group(1))
-
-    def test_03_list_shows_vm(self, server):
-        """List should show exactly one running VM."""
-        assert _vm_id is not None, "No VM created"
+    def test_01_create_vm(self, vm_id):
+        """Create a VM (the shared vm_id fixture) and verify its ID."""
+        assert re.fullmatch(r"[0-9a-f-]{36}", vm_id), f"Unexpected VM ID: {vm_id!r}"
 
+    def test_02_list_shows_vm(self, vm_id):
+        """List should show exactly one VM, the shared one, running."""
         stdout, _, rc = cli("list")
         assert rc == 0
-        assert _vm_id in stdout
-        assert "Running" in stdout
-        assert "Total: 1 VM(s)" in stdout
+        assert vm_id.encode() in stdout
+        assert b"Running" in stdout
+        assert b"Total: 1 VM(s)" in stdout
 
-    def test_04_exec_echo(self, server):
+    def test_03_exec_echo(self, exec_results):
         """Execute echo inside the VM and verify output."""
-        assert _vm_id is not None, "No VM created"
+        resp = exec_results["echo"]
+        assert resp.exit_code == 0
+        assert b"hello from VM" in resp.stdout
 
-        stdout, _, rc = cli("exec", _vm_id, "--", "echo", "hello from VM")
-        assert rc == 0
-        assert "hello from VM" in stdout
-
-    def test_05_exec_uname(self, server):
+    def test_04_exec_uname(self, exec_results):
         """Execute uname inside the VM."""
-        assert _vm_id is not None, "No VM created"
-
-        stdout, _, rc = cli("exec", _vm_id, "--", "uname", "-a")
-        assert rc == 0
-        assert "Linux" in stdout
-        log.info("VM kernel: %s", stdout.strip())
+        resp = exec_results["uname"]
+        assert resp.exit_code == 0
+        assert b"Linux" in resp.stdout
+        log.info("VM kernel: %s", resp.stdout.decode("utf-8", errors="replace").strip())
 
-    def test_06_exec_exit_code(self, server):
+    def test_05_exec_exit_code(self, exec_results):
         """Verify non-zero exit codes propagate."""
-        assert _vm_id is not None, "No VM created"
-
-        _, _, rc = cli("exec", _vm_id, "--", "false")
-        assert rc != 0, "Expected non-zero exit code from 'false'"
+        resp = exec_results["exit_code"]
+        assert resp.exit_code != 0, "Expected non-zero exit code from 'false'"
 
-    def test_07_exec_stderr(self, server):
+    def test_06_exec_stderr(self, exec_results):
         """Verify stderr is captured from commands."""
-        assert _vm_id is not None, "No VM created"
-
-        stdout, stderr, rc = cli("exec", _vm_id, "--", "ls", "/nonexistent_path")
-        assert rc != 0
-        # stderr from the guest command is written to our stderr
-        combined = stdout + stderr
-        assert "No such file" in combined or "cannot access" in combined
+        resp = exec_results["stderr"]
+        assert resp.exit_code != 0
+        combined = resp.stdout + resp.stderr
+        assert b"No such file" in combined or b"cannot access" in combined
 
-    def test_08_exec_multiword(self, server):
+    def test_07_exec_multiword(self, exec_results):
         """Execute a command with multiple arguments."""
-        assert _vm_id is not None, "No VM created"
-
-        stdout, _, rc = cli("exec", _vm_id, "--", "cat", "/proc/cpuinfo")
-        assert rc == 0
-        assert "processor" in stdout
-        log.info("VM has cpuinfo output (%d bytes)", len(stdout))
+        resp = exec_results["multiword"]
+        assert resp.exit_code == 0
+        assert b"processor" in resp.stdout
+        log.info("VM has cpuinfo output (%d bytes)", len(resp.stdout))
 
-    def test_09_dns_resolution(self, server):
+    def test_08_dns_resolution(self, exec_results, network_results):
         """Test that DNS resolution works inside the VM."""
-        assert _vm_id is not None, "No VM created"
+        resolv = exec_results["resolv"].stdout.decode()
+        log.info("VM DNS config:\n%s", resolv.strip())
+        assert "192.168.100.1" in resolv, "Expected nameserver 192.168.100.1 in resolv.conf"
 
-        stdout_dns, _, _ = cli("exec", _vm_id, "--", "cat", "/etc/resolv.conf")
-        log.info("VM DNS config:\n%s", stdout_dns.strip())
-        assert "192.168.100.1" in stdout_dns, "Expected nameserver 192.168.100.1 in resolv.conf"
+        # DNS resolution goes through the DNS proxy on the gateway
+        resp = network_results["dns"]
+        assert b"DNS_REACHABLE" in resp.stdout, "DNS proxy (192.168.100.1:53) should be reachable"
 
-        # Test DNS resolution via the DNS proxy (resolves through gateway)
-        cmd = (
-            "timeout 10 bash -c"
-            " '(echo > /dev/tcp/192.168.100.1/53) 2>/dev/null"
-            " && echo DNS_REACHABLE || echo DNS_UNREACHABLE'"
-        )
-        stdout, stderr, rc = cli(
-            "exec",
-            _vm_id,
-            "--",
-            "bash",
-            "-c",
-            cmd,
-            timeout=20,
-        )
-        combined = (stdout + stderr).strip()
-        log.info("DNS connectivity test: exit_code=%d, output: %s", rc, combined)
-        assert "DNS_REACHABLE" in stdout, "DNS proxy (192.168.100.1:53) should be reachable"
-
-    def test_10_http_egress(self, server):
+    def test_09_http_egress(self, network_results):
         """Test that HTTP egress works through the Envoy proxy."""
-        assert _vm_id is not None, "No VM created"
-
-        cmd = (
-            "timeout 10 bash -c '(echo -e"
-            ' "GET / HTTP/1.1\\r\\nHost: example.com'
-            '\\r\\nConnection: close\\r\\n\\r\\n"'
-            " > /dev/tcp/93.184.216.34/80"
-            " && echo HTTP_OK) || echo HTTP_FAIL'"
-        )
-        stdout, stderr, rc = cli(
-            "exec",
-            _vm_id,
-            "--",
-            "bash",
-            "-c",
-            cmd,
-            timeout=20,
-        )
-        combined = (stdout + stderr).strip()
-        log.info("HTTP egress test: exit_code=%d, output: %s", rc, combined)
-        assert "HTTP_OK" in stdout, "HTTP egress to example.com should work"
+        resp = network_results["http"]
+        assert b"HTTP_OK" in resp.stdout, "HTTP egress to example.com should work"
 
-    def test_11_https_egress(self, server):
+    def test_10_https_egress(self, network_results):
         """Test that HTTPS egress works through the TLS MITM proxy."""
-        assert _vm_id is not None, "No VM created"
-
-        # Use curl with -k (skip cert verification) since we're testing the
-        # proxy chain, not the CA trust store.  Use --max-time instead of the
-        # timeout command so curl can flush output before exiting.
-        cmd = (
-            "if command -v curl &>/dev/null; then"
-            " curl -4 -k --max-time 15 --connect-timeout 5"
-            " -o /dev/null -w 'HTTP_STATUS=%{http_code}\\n'"
-            " https://example.com 2>&1; echo CURL_EXIT=$?;"
-            " else timeout 12 bash -c"
-            " '(echo > /dev/tcp/example.com/443) 2>/dev/null"
-            " && echo HTTPS_OK || echo HTTPS_FAIL'; fi"
-        )
-        stdout, stderr, rc = cli(
-            "exec",
-            _vm_id,
-            "--",
-            "bash",
-            "-c",
-            cmd,
-            timeout=30,
-        )
-        combined = (stdout + stderr).strip()
-        log.info("HTTPS egress test: exit_code=%d, output: %s", rc, combined)
-        assert "HTTP_STATUS=200" in stdout, "HTTPS egress to example.com should return 200"
+        resp = network_results["https"]
+        assert b"HTTP_STATUS=200" in resp.stdout, "HTTPS egress to example.com should return 200"
 
-    def test_12_non_http_blocked(self, server):
+    def test_11_non_http_blocked(self, network_results):
         """Test that non-HTTP/HTTPS/DNS traffic is blocked."""
-        assert _vm_id is not None, "No VM created"
-
-        # Try to connect to port 22 on an external host — should be blocked
-        cmd = (
-            "timeout 5 bash -c"
-            " '(echo > /dev/tcp/8.8.8.8/22) 2>/dev/null"
-            " && echo PORT22_OPEN || echo PORT22_BLOCKED'"
+        resp = network_results["port22"]
+        assert b"PORT22_BLOCKED" in resp.stdout or resp.exit_code != 0, (
+            "Non-HTTP traffic (port 22) should be blocked"
         )
-        stdout, stderr, rc = cli(
-            "exec",
-            _vm_id,
-            "--",
-            "bash",
-            "-c",
-            cmd,
-            timeout=15,
-        )
-        combined = (stdout + stderr).strip()
-        log.info("Non-HTTP traffic test: exit_code=%d, output: %s", rc, combined)
-        assert "PORT22_BLOCKED" in stdout or rc != 0, "Non-HTTP traffic (port 22) should be blocked"
-
-    def test_13_delete_vm(self, server):
-        """Delete the VM."""
-        assert _vm_id is not None, "No VM created"
-
-        stdout, _, rc = cli("delete", _vm_id)
-        assert rc == 0
-        assert "VM deleted successfully" in stdout
-
-    def test_14_list_empty_after_delete(self, server):
-        """After deletion, list should be empty again."""
-        stdout, _, rc = cli("list")
-        assert rc == 0
-        assert "No VMs running" in stdout
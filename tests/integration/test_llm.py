@@ -18,19 +18,18 @@ Usage:
 import json
 import logging
 import os
-import re
 import sqlite3
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
+from _common import RETRY_DELAY_MAX, RETRY_DELAY_START, events_db_path
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-CLI_BIN = os.path.join(PROJECT_ROOT, "target", "debug", "clawpot")
-
 logging.basicConfig(
     level=logging.DEBUG,
     format="%(asctime)s [%(levelname)-5s] %(message)s",
@@ -39,7 +38,6 @@ logging.basicConfig(
 log = logging.getLogger("clawpot-llm")
 
 # Module-level state shared across ordered tests
-_vm_id: str | None = None
 _non_streaming_corr_id: str | None = None
 _streaming_corr_id: str | None = None
 
@@ -56,45 +54,48 @@ pytestmark = pytest.mark.skipif(
 )
 
 
-def cli(*args: str, timeout: float = 60) -> tuple[str, str, int]:
-    """Run the clawpot CLI and return (stdout, stderr, exit_code)."""
-    import subprocess
-
-    cmd = [CLI_BIN, *args]
-    log.info("CLI: %s", " ".join(cmd))
-
-    result = subprocess.run(cmd, capture_output=True, timeout=timeout)
-    stdout = result.stdout.decode("utf-8", errors="replace")
-    stderr = result.stderr.decode("utf-8", errors="replace")
-
-    log.info("  exit_code=%d", result.returncode)
-    if stdout.strip():
-        for line in stdout.strip().splitlines():
-            log.info("  stdout: %s", line)
-    if stderr.strip():
-        for line in stderr.strip().splitlines():
-            log.warning("  stderr: %s", line)
-
-    return stdout, stderr, result.returncode
-
+EVENT_COLUMNS = (
+    "id",
+    "event_type",
+    "category",
+    "vm_id",
+    "correlation_id",
+    "duration_ms",
+    "success",
+    "data",
+)
 
-def events_db_path():
-    """Resolve the events DB path."""
-    path = os.environ.get("CLAWPOT_EVENTS_DB")
-    if path:
-        return path
-    root = os.environ.get("CLAWPOT_ROOT", PROJECT_ROOT)
-    return os.path.join(root, "data", "events.db")
 
+@pytest.fixture(scope="module")
+def events_conn(server):
+    """One read-only connection to the events DB, shared by every query here.
 
-def query_events(event_type=None, category=None, vm_id=None):
-    """Query events from the DB."""
-    db_path = events_db_path()
-    conn = sqlite3.connect(db_path)
+    Outside an explicit transaction each SELECT reads the latest committed
+    state, so reusing the connection never hides events written later.
+    """
+    conn = sqlite3.connect(events_db_path())
     conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA query_only=1")
+    conn.execute("PRAGMA mmap_size=67108864")
+    yield conn
+    conn.close()
+
 
-    cols = "id, event_type, category, vm_id, correlation_id, duration_ms, success, data"
-    sql = f"SELECT {cols} FROM events WHERE 1=1"
+def query_events(
+    conn,
+    event_type=None,
+    category=None,
+    vm_id=None,
+    correlation_id=None,
+    columns=EVENT_COLUMNS,
+    order=True,
+):
+    """Query events from the DB, returning one dict per row keyed by column.
+
+    Only the requested columns are read; data is JSON-decoded when included.
+    Pass order=False when the caller doesn't care about row order.
+    """
+    sql = f"SELECT {', '.join(columns)} FROM events WHERE 1=1"
     params = []
 
     if event_type:
@@ -106,35 +107,92 @@ def query_events(event_type=None, category=None, vm_id=None):
     if vm_id:
         sql += " AND vm_id = ?"
         params.append(vm_id)
+    if correlation_id:
+        sql += " AND correlation_id = ?"
+        params.append(correlation_id)
+
+    if order:
+        sql += " ORDER BY id ASC"
+
+    events = [dict(zip(columns, r, strict=True)) for r in conn.execute(sql, params)]
+    if "data" in columns:
+        for event in events:
+            event["data"] = json.loads(event["data"])
+    return events
+
+
+def wait_for_events(conn, event_type, vm_id, min_count, timeout=5.0):
+    """Poll until at least min_count matching events are recorded, and return them.
+
+    The server writes events asynchronously, so they can trail the request
+    that caused them by a moment.
+    """
+    deadline = time.monotonic() + timeout
+    delay = RETRY_DELAY_START
+    while True:
+        events = query_events(conn, event_type=event_type, vm_id=vm_id)
+        if len(events) >= min_count or time.monotonic() >= deadline:
+            return events
+        time.sleep(delay)
+        delay = min(delay * 1.5, RETRY_DELAY_MAX)
+
+
+def count_events_containing(conn, needle):
+    """Return (total events, events whose data contains needle), scanned in SQLite."""
+    total, matches = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(INSTR(data, ?) > 0), 0) FROM events", (needle,)
+    ).fetchone()
+    return total, matches
+
+
+# The two Messages API calls made from inside the VM. They are independent,
+# so llm_responses issues them concurrently.
+LLM_REQUESTS = {
+    "non_streaming": {
+        "model": "claude-haiku-4-5-20251001",
+        "max_tokens": 32,
+        "messages": [{"role": "user", "content": "Say hello in exactly 3 words."}],
+    },
+    "streaming": {
+        "model": "claude-haiku-4-5-20251001",
+        "max_tokens": 32,
+        "stream": True,
+        "messages": [{"role": "user", "content": "Count from 1 to 5."}],
+    },
+}
+
+
+MESSAGES_CURL_SCRIPT = (
+    "curl -4 -k --max-time 30 --connect-timeout 10 -s"
+    " -X POST https://api.anthropic.com/v1/messages"
+    " -H 'Content-Type: application/json'"
+    " -H 'x-api-key: dummy-key-from-vm'"
+    " -H 'anthropic-version: 2023-06-01'"
+    ' --data-binary "$1"'
+)
 
-    sql += " ORDER BY id ASC"
 
-    rows = conn.execute(sql, params).fetchall()
-    conn.close()
+def messages_curl_argv(request: dict) -> list[str]:
+    """Build the in-VM argv that POSTs request to the Messages API.
 
-    return [
-        {
-            "id": r[0],
-            "event_type": r[1],
-            "category": r[2],
-            "vm_id": r[3],
-            "correlation_id": r[4],
-            "duration_ms": r[5],
-            "success": r[6],
-            "data": json.loads(r[7]),
-        }
-        for r in rows
-    ]
+    The JSON body is passed to bash as a positional argument rather than spliced
+    into the script, so prompts containing quotes need no shell escaping. The VM
+    sends x-api-key: dummy — the server should strip it and inject the real key
+    from CLAWPOT_ANTHROPIC_API_KEY.
+    """
+    body = json.dumps(request, separators=(",", ":"))
+    return ["bash", "-c", MESSAGES_CURL_SCRIPT, "curl", body]
 
 
-def query_all_event_data():
-    """Return all event data fields as raw strings for key-leak scanning."""
-    db_path = events_db_path()
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA busy_timeout=5000")
-    rows = conn.execute("SELECT data FROM events").fetchall()
-    conn.close()
-    return [r[0] for r in rows]
+@pytest.fixture(scope="class")
+def llm_responses(client, vm_id):
+    """Send LLM_REQUESTS through the proxy concurrently; map name to curl stdout."""
+    with ThreadPoolExecutor(max_workers=len(LLM_REQUESTS)) as pool:
+        futures = {
+            name: pool.submit(client.exec_vm, vm_id, messages_curl_argv(request), timeout=45)
+            for name, request in LLM_REQUESTS.items()
+        }
+        return {name: future.result().stdout for name, future in futures.items()}
 
 
 # ---------------------------------------------------------------------------
@@ -145,44 +203,10 @@ def query_all_event_data():
 class TestLlm:
     """LLM API tracing tests. Tests run in order within this class."""
 
-    def test_01_create_vm(self, server):
-        """Create a VM for LLM tests."""
-        global _vm_id
-
-        stdout, _, rc = cli("create", "--vcpus", "1", "--memory", "256")
-        assert rc == 0
-        assert "VM created successfully" in stdout
-
-        match = re.search(r"VM ID:\s+([0-9a-f-]{36})", stdout)
-        assert match, f"Could not parse VM ID from output:\n{stdout}"
-        _vm_id = match.group(1)
-        log.info("Created VM for LLM tests: %s", _vm_id)
-
-    def test_02_non_streaming_request(self, server):
+    def test_01_non_streaming_request(self, llm_responses):
         """Send a non-streaming Haiku request through the proxy."""
-        assert _vm_id is not None, "No VM created"
-
-        request_body = json.dumps(
-            {
-                "model": "claude-haiku-4-5-20251001",
-                "max_tokens": 32,
-                "messages": [{"role": "user", "content": "Say hello in exactly 3 words."}],
-            }
-        )
-
-        # The VM sends x-api-key: dummy — the server should strip it
-        # and inject the real key from CLAWPOT_ANTHROPIC_API_KEY
-        cmd = (
-            "curl -4 -k --max-time 30 --connect-timeout 10 -s"
-            " -X POST https://api.anthropic.com/v1/messages"
-            " -H 'Content-Type: application/json'"
-            " -H 'x-api-key: dummy-key-from-vm'"
-            " -H 'anthropic-version: 2023-06-01'"
-            f" -d '{request_body}'"
-        )
-
-        stdout, _stderr, _rc = cli("exec", _vm_id, "--", "bash", "-c", cmd, timeout=45)
-        log.info("Non-streaming response: %s", stdout[:300])
+        stdout = llm_responses["non_streaming"]
+        log.info("Non-streaming response: %s", stdout[:300].decode("utf-8", errors="replace"))
 
         # Parse the JSON response
         response = json.loads(stdout)
@@ -201,36 +225,19 @@ class TestLlm:
             assert len(content) > 0, "Expected at least one content block"
             log.info("Haiku says: %s", content[0].get("text", ""))
 
-    def test_03_streaming_request(self, server):
+    def test_02_streaming_request(self, llm_responses):
         """Send a streaming Haiku request through the proxy."""
-        assert _vm_id is not None, "No VM created"
-
-        request_body = json.dumps(
-            {
-                "model": "claude-haiku-4-5-20251001",
-                "max_tokens": 32,
-                "stream": True,
-                "messages": [{"role": "user", "content": "Count from 1 to 5."}],
-            }
-        )
-
-        cmd = (
-            "curl -4 -k --max-time 30 --connect-timeout 10 -s"
-            " -X POST https://api.anthropic.com/v1/messages"
-            " -H 'Content-Type: application/json'"
-            " -H 'x-api-key: dummy-key-from-vm'"
-            " -H 'anthropic-version: 2023-06-01'"
-            f" -d '{request_body}'"
+        stdout = llm_responses["streaming"]
+        log.info(
+            "Streaming response (first 300 chars): %s",
+            stdout[:300].decode("utf-8", errors="replace"),
         )
 
-        stdout, _stderr, _rc = cli("exec", _vm_id, "--", "bash", "-c", cmd, timeout=45)
-        log.info("Streaming response (first 300 chars): %s", stdout[:300])
-
         # If the API has credits, we get SSE events. If not, we get a JSON error.
         # Either way, key injection is verified if the error is not "authentication_error".
-        if "event: message_start" in stdout:
-            assert "event: content_block_delta" in stdout
-            assert "event: message_stop" in stdout
+        if b"event: message_start" in stdout:
+            assert b"event: content_block_delta" in stdout
+            assert b"event: message_stop" in stdout
             log.info("Got streaming SSE response")
         else:
             response = json.loads(stdout)
@@ -239,22 +246,22 @@ class TestLlm:
             assert error_type != "authentication_error", f"Key injection failed: {error_msg}"
             log.info("API returned non-auth error (key injection OK): %s", error_msg)
 
-    def test_04_events_recorded(self, server):
+    def test_03_events_recorded(self, events_conn, vm_id):
         """Verify llm.request and llm.response events were recorded."""
-        assert _vm_id is not None, "No VM created"
         global _non_streaming_corr_id, _streaming_corr_id
 
-        # Small delay to ensure async events are flushed
-        time.sleep(0.5)
-
-        requests = query_events(event_type="llm.request", vm_id=_vm_id)
+        requests = wait_for_events(events_conn, "llm.request", vm_id, 2)
         assert len(requests) >= 2, f"Expected at least 2 llm.request events, got {len(requests)}"
 
-        responses = query_events(event_type="llm.response", vm_id=_vm_id)
+        responses = wait_for_events(events_conn, "llm.response", vm_id, 2)
         assert len(responses) >= 2, f"Expected at least 2 llm.response events, got {len(responses)}"
 
+        # The two requests run concurrently, so tell them apart by their
+        # streaming flag rather than by insertion order
+        non_stream_req = next(r for r in requests if not r["data"].get("streaming"))
+        stream_req = next(r for r in requests if r["data"].get("streaming"))
+
         # Verify non-streaming request event fields
-        non_stream_req = requests[0]
         assert non_stream_req["data"]["provider"] == "anthropic"
         assert non_stream_req["data"]["endpoint"] == "messages"
         assert non_stream_req["data"]["model"] == "claude-haiku-4-5-20251001"
@@ -264,7 +271,6 @@ class TestLlm:
         _non_streaming_corr_id = non_stream_req["correlation_id"]
 
         # Verify streaming request event fields
-        stream_req = requests[1]
         assert stream_req["data"]["provider"] == "anthropic"
         assert stream_req["data"]["streaming"] is True
         _streaming_corr_id = stream_req["correlation_id"]
@@ -273,7 +279,10 @@ class TestLlm:
         # Note: if the API account has no credits, responses will have error
         # status codes and null model/tokens. The key thing is that events
         # are recorded and correlated correctly.
-        non_stream_resp = responses[0]
+        resp_by_corr = {r["correlation_id"]: r for r in responses}
+        assert _non_streaming_corr_id in resp_by_corr, "No llm.response for non-streaming request"
+        assert _streaming_corr_id in resp_by_corr, "No llm.response for streaming request"
+        non_stream_resp = resp_by_corr[_non_streaming_corr_id]
         assert non_stream_resp["data"]["provider"] == "anthropic"
         assert non_stream_resp["data"]["endpoint"] == "messages"
         assert non_stream_resp["data"]["status_code"] is not None
@@ -288,7 +297,7 @@ class TestLlm:
             non_stream_resp["data"].get("output_tokens"),
         )
 
-        stream_resp = responses[1]
+        stream_resp = resp_by_corr[_streaming_corr_id]
         assert stream_resp["data"]["provider"] == "anthropic"
         assert stream_resp["data"]["status_code"] is not None
         assert stream_resp["correlation_id"] == _streaming_corr_id
@@ -312,13 +321,18 @@ class TestLlm:
             assert len(text) > 0
             log.info("Streaming reassembled text: %s", text[:80])
 
-    def test_05_correlation_with_network_events(self, server):
+    def test_04_correlation_with_network_events(self, events_conn, vm_id):
         """Verify llm events share correlation_id with network events."""
         assert _non_streaming_corr_id is not None, "No correlation ID captured"
 
         # The llm.request and network.http.request should share a correlation_id
-        all_events = query_events(vm_id=_vm_id)
-        corr_events = [e for e in all_events if e["correlation_id"] == _non_streaming_corr_id]
+        corr_events = query_events(
+            events_conn,
+            vm_id=vm_id,
+            correlation_id=_non_streaming_corr_id,
+            columns=("event_type",),
+            order=False,
+        )
 
         event_types = {e["event_type"] for e in corr_events}
         for expected in [
@@ -334,21 +348,12 @@ class TestLlm:
             sorted(event_types),
         )
 
-    def test_06_api_key_not_in_events(self, server):
+    def test_05_api_key_not_in_events(self, events_conn):
         """Verify the real API key never appears in any event data."""
         api_key = os.environ.get("CLAWPOT_ANTHROPIC_API_KEY", "")
         assert len(api_key) > 0, "API key should be set"
 
-        all_data = query_all_event_data()
-        for data_str in all_data:
-            assert api_key not in data_str, "API key found in event data (key leak detected)"
-
-        log.info("Scanned %d events — API key not found in any event data", len(all_data))
-
-    def test_07_delete_vm(self, server):
-        """Clean up: delete the LLM test VM."""
-        assert _vm_id is not None, "No VM created"
+        scanned, leaks = count_events_containing(events_conn, api_key)
+        assert leaks == 0, f"API key found in {leaks} event(s) (key leak detected)"
 
-        stdout, _, rc = cli("delete", _vm_id)
-        assert rc == 0
-        assert "VM deleted successfully" in stdout
+        log.info("Scanned %d events — API key not found in any event data", scanned)
@@ -15,19 +15,27 @@ Usage:
 """
 
 import argparse
+import errno
+import functools
+import hashlib
 import os
-import random
+import re
+import select
 import shlex
 import shutil
 import signal
+import socket
 import subprocess
 import sys
 import tempfile
 import time
+from pathlib import Path
 
 # Persistent state (survives VM destroy, holds golden image + keys)
 DEV_DIR = "/var/lib/clawpot-dev"
 GOLDEN_IMG = f"{DEV_DIR}/devvm-golden.qcow2"
+# Digest of the cloud-init config GOLDEN_IMG was provisioned with
+GOLDEN_PROVENANCE = f"{GOLDEN_IMG}.provenance"
 BASE_IMG = f"{DEV_DIR}/ubuntu-24.04-cloudimg.img"
 SSH_KEY = f"{DEV_DIR}/ssh/id_ed25519"
 SSH_PUBKEY = f"{DEV_DIR}/ssh/id_ed25519.pub"
@@ -42,6 +50,19 @@ def vm_dir(vm_id):
     return f"/tmp/devvm-{vm_id}"
 
 
+def remove_vm_dir(vdir):
+    """Remove a VM runtime directory; return False if it didn't exist.
+
+    shutil.rmtree already walks the tree with scandir on a directory fd and
+    unlinkat on Linux, so the only saving left is not stat'ing the path first.
+    """
+    try:
+        shutil.rmtree(vdir)
+    except FileNotFoundError:
+        return False
+    return True
+
+
 def devvm_file():
     """Return the path to the .devvm file at the project root."""
     return os.path.join(project_root(), ".devvm")
@@ -70,6 +91,7 @@ def save_vm_id(vm_id):
 
 
 BASE_IMG_URL = "https://cloud-images.ubuntu.com/noble/current/noble-server-cloudimg-amd64.img"
+BASE_IMG_SUMS_URL = "https://cloud-images.ubuntu.com/noble/current/SHA256SUMS"
 FIRECRACKER_VERSION = "v1.9.1"
 
 SSH_USER = "ci"
@@ -102,8 +124,13 @@ def run(cmd, **kwargs):
     return subprocess.run(cmd, check=True, **kwargs)
 
 
+@functools.cache
 def project_root():
-    """Find the project root (directory containing Cargo.toml)."""
+    """Find the project root (directory containing Cargo.toml).
+
+    Cached: .devvm lookups and sync all need it, and the answer can't change
+    while we run.
+    """
     d = os.path.dirname(os.path.abspath(__file__))
     while d != "/":
         if os.path.exists(os.path.join(d, "Cargo.toml")):
@@ -120,15 +147,15 @@ def load_connection(vm_id=None):
     if vm_id is None:
         return None
     conn_env = os.path.join(vm_dir(vm_id), "connection.env")
-    if not os.path.exists(conn_env):
+    try:
+        lines = Path(conn_env).read_text().splitlines()
+    except FileNotFoundError:
         return None
-    conn = {}
-    with open(conn_env) as f:
-        for line in f:
-            line = line.strip()
-            if "=" in line and not line.startswith("#"):
-                k, v = line.split("=", 1)
-                conn[k] = v
+    conn = dict(
+        line.strip().split("=", 1)
+        for line in lines
+        if "=" in line and not line.lstrip().startswith("#")
+    )
     # Verify the process is actually alive
     pid = conn.get("DEVVM_PID")
     if pid:
@@ -145,6 +172,23 @@ def load_connection(vm_id=None):
     return conn
 
 
+def ssh_control_opts():
+    """SSH options that share one multiplexed connection per VM.
+
+    The first run/sync/ssh starts a master connection that lingers for a
+    minute, so back-to-back invocations skip the TCP + key exchange + auth
+    handshake. The socket lives in a directory only the invoking user can
+    write, since anything that can connect to it gets a session in the VM.
+    """
+    control_dir = os.environ.get("XDG_RUNTIME_DIR") or os.path.expanduser("~/.ssh")
+    os.makedirs(control_dir, mode=0o700, exist_ok=True)
+    return [
+        "-o", "ControlMaster=auto",
+        "-o", f"ControlPath={control_dir}/devvm-%C",
+        "-o", "ControlPersist=60s",
+    ]
+
+
 def ssh_cmd(conn, extra_opts=None):
     """Build base SSH command from connection info."""
     cmd = [
@@ -152,6 +196,7 @@ def ssh_cmd(conn, extra_opts=None):
         "-i", SSH_KEY,
         "-p", conn["DEVVM_SSH_PORT"],
         *SSH_OPTS,
+        *ssh_control_opts(),
     ]
     if extra_opts:
         cmd.extend(extra_opts)
@@ -159,6 +204,140 @@ def ssh_cmd(conn, extra_opts=None):
     return cmd
 
 
+def wait_for_pid_exit(pid, timeout, progress_every=None):
+    """Block until pid exits or timeout seconds pass; return True if it exited.
+
+    Works for processes that are not our children (QEMU daemonizes) by
+    polling a pidfd, so we wake as soon as the process is gone instead of
+    on the next tick of a sleep loop. With progress_every, log a progress
+    line at that interval while waiting.
+    """
+    try:
+        pidfd = os.pidfd_open(pid)
+    except ProcessLookupError:
+        return True
+    try:
+        poller = select.poll()
+        poller.register(pidfd, select.POLLIN)
+        start = time.monotonic()
+        while True:
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                return False
+            step = min(remaining, progress_every or remaining)
+            if poller.poll(step * 1000):
+                return True
+            if progress_every:
+                info(f"  ... waiting ({int(time.monotonic() - start)}/{timeout}s)")
+    finally:
+        os.close(pidfd)
+
+
+def wait_for_ssh_banner(port, deadline):
+    """Wait until localhost:port greets us with an SSH banner.
+
+    QEMU's user-mode network accepts forwarded connections even before the
+    guest's sshd is listening (and then drops them), so a successful connect
+    alone proves nothing; the "SSH-" banner does. Returns False once
+    deadline (a time.monotonic() value) passes.
+    """
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        # Bound each probe like ssh's ConnectTimeout=3: a forwarded connection
+        # the guest never answers would otherwise hang until the deadline
+        probe_timeout = min(3, remaining)
+        try:
+            with socket.create_connection(("localhost", port), timeout=probe_timeout) as sock:
+                if sock.recv(4) == b"SSH-":
+                    return True
+        except OSError:
+            pass
+        time.sleep(min(0.5, max(0, deadline - time.monotonic())))
+
+
+@functools.cache
+def io_uring_available():
+    """Whether QEMU can use aio=io_uring here.
+
+    Both the host kernel has to let us (root) create io_uring instances and
+    QEMU has to be built with liburing; a build without it refuses to start
+    a VM whose drive asks for aio=io_uring.
+    """
+    try:
+        # Linux 6.6+: 0 = enabled, 1 = privileged users only, 2 = disabled
+        with open("/proc/sys/kernel/io_uring_disabled") as f:
+            kernel_ok = f.read().strip() != "2"
+    except OSError:
+        # Older kernels have no knob; io_uring exists from 5.1 onwards
+        m = re.match(r"(\d+)\.(\d+)", os.uname().release)
+        kernel_ok = m is not None and (int(m.group(1)), int(m.group(2))) >= (5, 1)
+    if not kernel_ok:
+        return False
+
+    # qemu-img shares QEMU's block layer, so opening a scratch file with
+    # aio=io_uring fails exactly when the VM's drive would
+    with tempfile.NamedTemporaryFile() as scratch:
+        try:
+            result = subprocess.run(
+                ["qemu-img", "info", "-U", "--image-opts",
+                 f"driver=file,filename={scratch.name},aio=io_uring"],
+                capture_output=True,
+            )
+        except FileNotFoundError:
+            return False
+    return result.returncode == 0
+
+
+def supports_o_direct(path):
+    """Whether path's filesystem accepts O_DIRECT (tmpfs before 6.6 does not)."""
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECT)
+    except OSError:
+        return False
+    os.close(fd)
+    return True
+
+
+def drive_io_opts(path):
+    """Extra -drive suboptions picking the fastest AIO backend for a disk image.
+
+    QEMU's default aio=threads bounces every request through a worker thread
+    pool. Prefer io_uring, then Linux native AIO (which needs O_DIRECT), and
+    bypass the host page cache when the filesystem allows it, since the guest
+    already caches.
+    """
+    direct = supports_o_direct(path)
+    if io_uring_available():
+        aio = "io_uring"
+    elif direct:
+        aio = "native"
+    else:
+        return ""
+    return f",aio={aio},cache.direct=on" if direct else f",aio={aio}"
+
+
+def write_file_atomic(path, text, mode=0o644):
+    """Write text to path so readers see either the old file or the new one.
+
+    The data goes to a temp file in the same directory, is fsynced, and is
+    renamed over path, so a concurrent reader or a crash mid-write never
+    leaves a truncated file behind.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
 # --- Bootstrap helpers ---
 
 
@@ -181,34 +360,88 @@ def ensure_ssh_key():
     if real_user:
         import pwd
         pw = pwd.getpwnam(real_user)
-        for f in [SSH_KEY, SSH_PUBKEY]:
-            os.chown(f, pw.pw_uid, pw.pw_gid)
-        os.chown(f"{DEV_DIR}/ssh", pw.pw_uid, pw.pw_gid)
+        ssh_dir_fd = os.open(os.path.dirname(SSH_KEY), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            for f in [SSH_KEY, SSH_PUBKEY]:
+                os.chown(os.path.basename(f), pw.pw_uid, pw.pw_gid, dir_fd=ssh_dir_fd)
+            os.chown(ssh_dir_fd, pw.pw_uid, pw.pw_gid)
+        finally:
+            os.close(ssh_dir_fd)
     info(f"Generated {SSH_KEY}")
 
 
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def published_base_image_sha256():
+    """SHA-256 that Ubuntu publishes for the BASE_IMG_URL image, or None if unlisted."""
+    sums = run(["curl", "-fsSL", BASE_IMG_SUMS_URL], capture_output=True, text=True).stdout
+    name = BASE_IMG_URL.rsplit("/", 1)[1]
+    for line in sums.splitlines():
+        digest, _, filename = line.partition(" ")
+        if filename.lstrip("*") == name:
+            return digest
+    return None
+
+
 def ensure_base_image():
     if os.path.exists(BASE_IMG):
         return
     info("Downloading Ubuntu 24.04 cloud image (this may take a minute)...")
-    run(["curl", "-fsSL", "--progress-bar", BASE_IMG_URL, "-o", BASE_IMG])
+    # Download to a .part file and rename it into place when complete, so an
+    # interrupted download is resumed (-C -) on the next launch instead of
+    # leaving a truncated image that looks finished.
+    part = f"{BASE_IMG}.part"
+    run(["curl", "-fsSL", "--progress-bar", "-C", "-", BASE_IMG_URL, "-o", part])
+
+    # noble/current moves when Ubuntu publishes a new build, so a resumed
+    # download can splice two images together; only a checksum catches that.
+    # On a mismatch the .part is deleted so the next launch starts afresh.
+    expected = published_base_image_sha256()
+    if expected is None or sha256_file(part) != expected:
+        os.remove(part)
+        error("Downloaded cloud image does not match the published SHA256SUMS "
+              "(upstream may have published a new build); run launch again")
+        sys.exit(1)
+    os.replace(part, BASE_IMG)
     info(f"Downloaded to {BASE_IMG}")
 
 
-def build_golden_image():
-    """Build the golden qcow2 image with cloud-init provisioning."""
-    info("Building golden dev VM image (this takes 3-5 minutes)...")
-
-    # Create golden image from cloud base
-    shutil.copy2(BASE_IMG, GOLDEN_IMG)
-    run(["qemu-img", "resize", GOLDEN_IMG, "20G"])
+def copy_image(src, dst):
+    """Copy a disk image without bouncing it through userspace.
 
-    ssh_pubkey = open(SSH_PUBKEY).read().strip()
+    copy_file_range lets the kernel do the copy, and on CoW filesystems
+    (Btrfs, XFS with reflink) it shares the extents instead of copying,
+    which turns a multi-GB copy into a metadata update. Falls back to
+    shutil.copyfile where the syscall isn't supported (e.g. across
+    filesystems on older kernels).
+    """
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+            return
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+    shutil.copyfile(src, dst)
+
+
+def cloud_init_config():
+    """Render the (user-data, meta-data) cloud-init pair for the golden image."""
+    ssh_pubkey = Path(SSH_PUBKEY).read_text().strip()
     arch = os.uname().machine
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Write cloud-init user-data
-        user_data = f"""\
+    user_data = f"""\
 #cloud-config
 hostname: clawpot-dev
 
@@ -235,25 +468,41 @@ packages:
   - pkg-config
   - libssl-dev
   - protobuf-compiler
+  - musl-tools
+  - eatmydata
 
 runcmd:
-  # Install uv system-wide
-  - curl -LsSf https://astral.sh/uv/install.sh | env UV_INSTALL_DIR=/usr/local/bin sh
-
-  # Install Rust toolchain for the ci user
-  - su - ci -c "curl --proto '=https' --tlsv1.2 -sSf https://sh.rustup.rs | sh -s -- -y"
-
-  # Install musl target
-  - apt-get install -y musl-tools
-  - su - ci -c ". ~/.cargo/env && rustup target add x86_64-unknown-linux-musl"
-
-  # Install Firecracker
+  # The installs below are independent downloads, so uv and Firecracker are
+  # fetched in the background while rustup (the slowest) runs. eatmydata
+  # drops their fsyncs; the poweroff at the end syncs everything to disk.
+  # If any install fails, runcmd stops before poweroff, so the host times out
+  # and never records provenance for the broken image.
   - |
-    curl -fsSL "https://github.com/firecracker-microvm/firecracker/releases/download/{FIRECRACKER_VERSION}/firecracker-{FIRECRACKER_VERSION}-{arch}.tgz" -o /tmp/firecracker.tgz
-    tar -xzf /tmp/firecracker.tgz -C /tmp
-    mv /tmp/release-{FIRECRACKER_VERSION}-{arch}/firecracker-{FIRECRACKER_VERSION}-{arch} /usr/local/bin/firecracker
-    chmod +x /usr/local/bin/firecracker
-    rm -rf /tmp/firecracker.tgz /tmp/release-{FIRECRACKER_VERSION}-{arch}
+    # Install uv system-wide (via a file: sh has no pipefail to catch a failed curl)
+    (
+      set -e
+      curl -LsSf https://astral.sh/uv/install.sh -o /tmp/uv-install.sh
+      env UV_INSTALL_DIR=/usr/local/bin eatmydata sh /tmp/uv-install.sh
+      rm -f /tmp/uv-install.sh
+    ) &
+    uv_pid=$!
+
+    # Install Firecracker
+    (
+      set -e
+      curl -fsSL "https://github.com/firecracker-microvm/firecracker/releases/download/{FIRECRACKER_VERSION}/firecracker-{FIRECRACKER_VERSION}-{arch}.tgz" -o /tmp/firecracker.tgz
+      tar -xzf /tmp/firecracker.tgz -C /tmp
+      mv /tmp/release-{FIRECRACKER_VERSION}-{arch}/firecracker-{FIRECRACKER_VERSION}-{arch} /usr/local/bin/firecracker
+      chmod +x /usr/local/bin/firecracker
+      rm -rf /tmp/firecracker.tgz /tmp/release-{FIRECRACKER_VERSION}-{arch}
+    ) &
+    fc_pid=$!
+
+    # Install Rust toolchain (with the musl target) for the ci user
+    su - ci -c "set -o pipefail; curl --proto '=https' --tlsv1.2 -sSf https://sh.rustup.rs | eatmydata sh -s -- -y --target x86_64-unknown-linux-musl" || exit 1
+
+    wait "$uv_pid" || exit 1
+    wait "$fc_pid" || exit 1
 
   # Ensure SSH is enabled
   - systemctl enable --now ssh
@@ -265,10 +514,76 @@ runcmd:
   # Power off when done
   - poweroff
 """
-        meta_data = """\
+    meta_data = """\
 instance-id: clawpot-dev-golden
 local-hostname: clawpot-dev
 """
+    return user_data, meta_data
+
+
+def config_digest(user_data, meta_data):
+    """Fingerprint of a cloud-init config, recorded next to the image it built."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in (user_data, meta_data):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def golden_image_stale():
+    """Whether the golden image is missing or was built from another config.
+
+    A golden image with no provenance file is treated as stale: it is either
+    left over from an interrupted build or predates provenance tracking.
+    """
+    if not os.path.exists(GOLDEN_IMG):
+        return True
+    try:
+        with open(GOLDEN_PROVENANCE) as f:
+            recorded = f.read().strip()
+    except FileNotFoundError:
+        return True
+    return recorded != config_digest(*cloud_init_config())
+
+
+def build_golden_image():
+    """Build the golden qcow2 image with cloud-init provisioning."""
+    info("Building golden dev VM image (this takes 3-5 minutes)...")
+
+    # Build next to GOLDEN_IMG and rename it into place at the end. Running
+    # dev VMs' overlays keep reading the old image's inode, and an
+    # interrupted build leaves the previous image untouched.
+    fd, build_img = tempfile.mkstemp(dir=DEV_DIR, prefix=".devvm-golden-", suffix=".qcow2")
+    os.close(fd)
+    try:
+        user_data, meta_data = provision_golden_image(build_img)
+        os.chmod(build_img, 0o644)
+        os.replace(build_img, GOLDEN_IMG)
+    except BaseException:
+        os.unlink(build_img)
+        raise
+
+    # Record which config built the image
+    write_file_atomic(GOLDEN_PROVENANCE, config_digest(user_data, meta_data) + "\n")
+
+    info("Golden dev VM image built successfully")
+
+
+def provision_golden_image(path):
+    """Copy the base image to path and provision it with cloud-init.
+
+    Returns the (user-data, meta-data) pair the image was provisioned with.
+    """
+    # Create golden image from cloud base. Ubuntu ships the cloud image as a
+    # compressed qcow2 already (hence the .img name but format=qcow2 below),
+    # so it is copied as-is; resizing only updates the qcow2 header.
+    copy_image(BASE_IMG, path)
+    run(["qemu-img", "resize", "-f", "qcow2", path, "20G"])
+
+    user_data, meta_data = cloud_init_config()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Write cloud-init user-data and meta-data
         with open(f"{tmpdir}/user-data", "w") as f:
             f.write(user_data)
         with open(f"{tmpdir}/meta-data", "w") as f:
@@ -277,13 +592,17 @@ local-hostname: clawpot-dev
         run(["cloud-localds", f"{tmpdir}/cloud-init.iso",
              f"{tmpdir}/user-data", f"{tmpdir}/meta-data"])
 
-        # Boot with cloud-init
+        # Boot with cloud-init. The image is throwaway until provisioning
+        # succeeds (an interrupted build never replaces GOLDEN_IMG),
+        # so guest flushes are ignored (cache=unsafe) and apt/dpkg/rustup
+        # run at page-cache speed; the image is fsynced once at the end.
         info("Booting golden image for provisioning...")
+        aio = ",aio=io_uring" if io_uring_available() else ""
         run([
             "qemu-system-x86_64",
             "-m", "2048", "-smp", "2",
             "-cpu", "host", "-enable-kvm",
-            "-drive", f"file={GOLDEN_IMG},format=qcow2,if=virtio",
+            "-drive", f"file={path},format=qcow2,if=virtio,cache=unsafe,discard=unmap{aio}",
             "-drive", f"file={tmpdir}/cloud-init.iso,format=raw,if=virtio",
             "-netdev", "user,id=net0",
             "-device", "virtio-net-pci,netdev=net0",
@@ -293,23 +612,12 @@ local-hostname: clawpot-dev
             "-daemonize",
         ])
 
-        qemu_pid = int(open(f"{tmpdir}/qemu.pid").read().strip())
+        qemu_pid = int(Path(tmpdir, "qemu.pid").read_text().strip())
         info(f"Provisioning VM started (PID {qemu_pid})")
 
         # Wait for cloud-init to finish (VM powers off when done)
         max_wait = 600
-        elapsed = 0
-        interval = 15
-        while elapsed < max_wait:
-            try:
-                os.kill(qemu_pid, 0)
-            except OSError:
-                break
-            time.sleep(interval)
-            elapsed += interval
-            info(f"  ... waiting ({elapsed}/{max_wait}s)")
-
-        if elapsed >= max_wait:
+        if not wait_for_pid_exit(qemu_pid, max_wait, progress_every=15):
             try:
                 os.kill(qemu_pid, signal.SIGKILL)
             except OSError:
@@ -317,7 +625,14 @@ local-hostname: clawpot-dev
             error("Golden image provisioning timed out")
             sys.exit(1)
 
-    info("Golden dev VM image built successfully")
+    # Persist what cache=unsafe left in the page cache before vouching for it
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+    return user_data, meta_data
 
 
 # --- Subcommands ---
@@ -341,7 +656,7 @@ def cmd_launch(args):
     ensure_ssh_key()
     ensure_base_image()
 
-    if args.rebuild or not os.path.exists(GOLDEN_IMG):
+    if args.rebuild or golden_image_stale():
         build_golden_image()
 
     # Generate a unique VM ID for this worktree
@@ -353,8 +668,7 @@ def cmd_launch(args):
     console_log = os.path.join(vdir, "console.log")
 
     # Create runtime directory (world-readable so non-root commands work)
-    if os.path.exists(vdir):
-        shutil.rmtree(vdir)
+    remove_vm_dir(vdir)
     os.makedirs(vdir, mode=0o755)
 
     # Create COW overlay
@@ -362,16 +676,24 @@ def cmd_launch(args):
     run(["qemu-img", "create", "-b", GOLDEN_IMG, "-F", "qcow2",
          "-f", "qcow2", overlay_img])
 
-    # Pick random SSH port
-    ssh_port = random.randint(10000, 60000)
+    # Let the kernel pick a free port for the SSH forward. QEMU's hostfwd
+    # listens on all addresses, so probe the same way; the port is released
+    # just before QEMU binds it, and ephemeral ports are handed out in
+    # sequence, so it is very unlikely to be reused in between.
+    with socket.socket() as sock:
+        sock.bind(("", 0))
+        ssh_port = sock.getsockname()[1]
 
-    # Launch QEMU
+    # Launch QEMU. The disk gets its own iothread so block I/O submission
+    # and completion don't queue behind everything else on the main loop.
     info(f"Launching dev VM {vm_id} (SSH port {ssh_port})...")
     run([
         "qemu-system-x86_64",
         "-m", "4096", "-smp", "2",
         "-cpu", "host", "-enable-kvm",
-        "-drive", f"file={overlay_img},format=qcow2,if=virtio",
+        "-object", "iothread,id=io0",
+        "-drive", f"file={overlay_img},format=qcow2,if=none,id=disk0{drive_io_opts(overlay_img)}",
+        "-device", "virtio-blk-pci,drive=disk0,iothread=io0",
         "-netdev", f"user,id=net0,hostfwd=tcp::{ssh_port}-:22",
         "-device", "virtio-net-pci,netdev=net0",
         "-display", "none",
@@ -380,14 +702,15 @@ def cmd_launch(args):
         "-daemonize",
     ])
 
-    qemu_pid = open(pid_file).read().strip()
+    qemu_pid = Path(pid_file).read_text().strip()
     info(f"QEMU started (PID {qemu_pid})")
 
-    # Wait for SSH
+    # Wait for SSH: block on the guest's sshd banner, then confirm that key
+    # auth works (cloud-init may still be setting up the user).
     info("Waiting for SSH...")
     max_wait = 120
-    elapsed = 0
-    while elapsed < max_wait:
+    deadline = time.monotonic() + max_wait
+    while wait_for_ssh_banner(ssh_port, deadline):
         result = subprocess.run(
             ["ssh", "-i", SSH_KEY, "-p", str(ssh_port), *SSH_OPTS,
              "-o", "ConnectTimeout=3", "-o", "BatchMode=yes",
@@ -397,27 +720,34 @@ def cmd_launch(args):
         if result.returncode == 0:
             info("SSH is ready")
             break
-        time.sleep(3)
-        elapsed += 3
-
-    if elapsed >= max_wait:
+        time.sleep(1)
+    else:
         error(f"SSH did not become available within {max_wait}s")
         error(f"Check console log: {console_log}")
         sys.exit(1)
 
-    # Write connection env
-    with open(conn_env, "w") as f:
-        f.write(f"DEVVM_SSH_PORT={ssh_port}\n")
-        f.write(f"DEVVM_SSH_KEY={SSH_KEY}\n")
-        f.write(f"DEVVM_SSH_USER={SSH_USER}\n")
-        f.write(f"DEVVM_SSH_HOST=localhost\n")
-        f.write(f"DEVVM_PID={qemu_pid}\n")
-        f.write(f"DEVVM_DIR={vdir}\n")
-
-    # Make runtime files readable by non-root users
-    for f in [conn_env, console_log, pid_file]:
-        if os.path.exists(f):
-            os.chmod(f, 0o644)
+    # Write connection env (world-readable so non-root commands work)
+    write_file_atomic(conn_env, (
+        f"DEVVM_SSH_PORT={ssh_port}\n"
+        f"DEVVM_SSH_KEY={SSH_KEY}\n"
+        f"DEVVM_SSH_USER={SSH_USER}\n"
+        f"DEVVM_SSH_HOST=localhost\n"
+        f"DEVVM_PID={qemu_pid}\n"
+        f"DEVVM_DIR={vdir}\n"
+    ), mode=0o644)
+
+    # Make runtime files readable by non-root users. Paths are resolved
+    # against one directory fd, and a missing file just fails its chmod
+    # rather than needing a separate existence check.
+    vdir_fd = os.open(vdir, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        for f in [console_log, pid_file]:
+            try:
+                os.chmod(os.path.basename(f), 0o644, dir_fd=vdir_fd)
+            except FileNotFoundError:
+                pass
+    finally:
+        os.close(vdir_fd)
 
     # Persist VM ID for this worktree
     save_vm_id(vm_id)
@@ -439,8 +769,7 @@ def cmd_destroy(args):
     if conn is None:
         warn("No running dev VM found")
         # Clean up stale runtime dir if it exists
-        if os.path.exists(vdir):
-            shutil.rmtree(vdir)
+        if remove_vm_dir(vdir):
             info(f"Cleaned up stale {vdir}")
         os.remove(devvm_file())
         return
@@ -450,19 +779,17 @@ def cmd_destroy(args):
 
     try:
         os.kill(pid, signal.SIGTERM)
-        time.sleep(2)
-        try:
-            os.kill(pid, 0)
+        if not wait_for_pid_exit(pid, 2):
             warn("QEMU did not exit gracefully, force killing...")
-            os.kill(pid, signal.SIGKILL)
-        except OSError:
-            pass
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
         info("QEMU process stopped")
     except OSError:
         info("QEMU process already stopped")
 
-    if os.path.exists(vdir):
-        shutil.rmtree(vdir)
+    if remove_vm_dir(vdir):
         info(f"Cleaned up {vdir}")
 
     os.remove(devvm_file())
@@ -500,8 +827,17 @@ def cmd_sync(args):
     root = project_root()
     info(f"Syncing {root} -> {SSH_USER}@vm:/work/clawpot/")
 
+    # The VM is reached over loopback, so bandwidth is free and CPU is the
+    # bottleneck: skip compression (rsync's and ssh's), send changed files
+    # whole rather than computing deltas, write them in place, and use an
+    # AES-NI accelerated cipher.
+    ssh_transport = [
+        "ssh", "-i", SSH_KEY, "-p", conn["DEVVM_SSH_PORT"], *SSH_OPTS,
+        *ssh_control_opts(),
+        "-o", "Compression=no", "-c", "aes128-gcm@openssh.com",
+    ]
     run([
-        "rsync", "-az", "--delete",
+        "rsync", "-a", "--delete", "--whole-file", "--inplace",
         "--rsync-path", "sudo rsync",
         "--chown", f"{SSH_USER}:{SSH_USER}",
         "--exclude", "target/",
@@ -509,7 +845,7 @@ def cmd_sync(args):
         "--exclude", "__pycache__/",
         "--exclude", "assets/kernels/",
         "--exclude", "assets/rootfs/",
-        "-e", f"ssh -i {SSH_KEY} -p {conn['DEVVM_SSH_PORT']} {' '.join(SSH_OPTS)}",
+        "-e", shlex.join(ssh_transport),
         f"{root}/",
         f"{SSH_USER}@localhost:/work/clawpot/",
     ])
@@ -557,7 +893,7 @@ def main():
 
     p_launch = sub.add_parser("launch", help="Launch a dev VM")
     p_launch.add_argument("--rebuild", action="store_true",
-                          help="Rebuild the golden image even if it exists")
+                          help="Rebuild the golden image even if it is up to date")
 
     sub.add_parser("destroy", help="Destroy the dev VM")
     sub.add_parser("status", help="Show dev VM status")
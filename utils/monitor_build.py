@@ -15,20 +15,42 @@ Environment variables:
 """
 
 import argparse
+import gzip
 import html
+import http.client
 import os
+import random
 import re
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.error import HTTPError
-from urllib.request import Request, urlopen
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+from urllib.request import urlopen
 import json
 
 API_BASE = "https://api.buildkite.com/v2"
+# Polls start MIN_POLL_INTERVAL apart and double while nothing changes, up to
+# --poll-interval, so a long-running job isn't polled every few seconds. The
+# cap stays at the old fixed interval, so a finished build is noticed no later.
+MIN_POLL_INTERVAL = 2  # seconds
 DEFAULT_POLL_INTERVAL = 10  # seconds
 DEFAULT_BUILD_WAIT_TIMEOUT = 120  # seconds to wait for a build to appear
+# Statuses worth retrying (rate limiting and transient gateway errors)
+API_RETRY_STATUSES = {429, 502, 503, 504}
+API_RETRIES = 3
+API_RETRY_BACKOFF = 0.3  # seconds; doubles on each retry
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # bytes per read when saving artifacts
+LOG_FETCH_WORKERS = 8  # concurrent job log downloads for a failed build
+ARTIFACT_DOWNLOAD_WORKERS = 8  # concurrent artifact downloads
+
+# A ref that is already a full commit SHA (lowercase, as git prints them)
+FULL_SHA_RE = re.compile(r"[0-9a-f]{40}")
+# <time> elements (timestamps, dropped with their text) or any other HTML tag
+HTML_MARKUP_RE = re.compile(r"<time[^>]*>[^<]*</time>|<[^>]+>")
 
 
 def get_token():
@@ -41,95 +63,204 @@ def get_token():
     return token
 
 
+# One keep-alive connection per thread, so polls don't redo the TCP+TLS
+# handshake and parallel log fetches don't share a connection.
+_api_local = threading.local()
+# path -> (ETag, decoded body) of the last response that carried an ETag
+_etag_cache: dict[str, tuple[str, dict | list | str]] = {}
+
+
+def _api_connection() -> http.client.HTTPSConnection:
+    conn = getattr(_api_local, "conn", None)
+    if conn is None:
+        host = urlsplit(API_BASE).hostname
+        conn = _api_local.conn = http.client.HTTPSConnection(host, timeout=60)
+    return conn
+
+
+def _api_request(token: str, url: str,
+                 headers: dict[str, str] | None = None) -> tuple[http.client.HTTPResponse, bytes]:
+    """GET a path on the API host over this thread's keep-alive connection.
+
+    Returns the response and its (gzip-decoded) body. Retries once on a new
+    connection if the server closed the idle one, and backs off and retries
+    on rate limiting and transient gateway errors.
+    """
+    # Job logs are plain text that compresses ~10x, which matters more than
+    # round trips once they are fetched concurrently
+    headers = {"Authorization": f"Bearer {token}", "Accept-Encoding": "gzip", **(headers or {})}
+    for attempt in range(API_RETRIES + 1):
+        conn = _api_connection()
+        try:
+            conn.request("GET", url, headers=headers)
+            resp = conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            # The server may have closed the idle connection; retry once on a new one
+            conn.close()
+            conn.request("GET", url, headers=headers)
+            resp = conn.getresponse()
+        body = resp.read()
+        if resp.status not in API_RETRY_STATUSES or attempt == API_RETRIES:
+            break
+        # Honour the server's Retry-After (in seconds) when it sends one
+        retry_after = resp.getheader("Retry-After", "")
+        time.sleep(int(retry_after) if retry_after.isdigit() else API_RETRY_BACKOFF * 2**attempt)
+
+    if resp.getheader("Content-Encoding") == "gzip":
+        body = gzip.decompress(body)
+    return resp, body
+
+
 def api_get(token: str, path: str) -> dict | list | str:
-    url = f"{API_BASE}{path}"
-    req = Request(url, headers={"Authorization": f"Bearer {token}"})
-    try:
-        with urlopen(req) as resp:
-            content_type = resp.headers.get("Content-Type", "")
-            body = resp.read().decode()
-            if "application/json" in content_type:
-                return json.loads(body)
-            return body
-    except HTTPError as e:
-        if e.code == 404:
-            return None
-        print(f"API error {e.code}: {e.read().decode()}", file=sys.stderr)
+    """GET an API path, reusing this thread's connection.
+
+    Sends If-None-Match for paths fetched before, so an unchanged resource
+    comes back as an empty 304 and the cached body is returned instead.
+    """
+    headers = {}
+    cached = _etag_cache.get(path)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    resp, body = _api_request(token, f"{urlsplit(API_BASE).path}{path}", headers)
+
+    if resp.status == 304 and cached:
+        return cached[1]
+    if resp.status == 404:
+        return None
+    if resp.status >= 400:
+        print(f"API error {resp.status}: {body.decode()}", file=sys.stderr)
         sys.exit(1)
 
+    content_type = resp.getheader("Content-Type", "")
+    result = json.loads(body) if "application/json" in content_type else body.decode()
+    etag = resp.getheader("ETag")
+    if etag:
+        _etag_cache[path] = (etag, result)
+    return result
+
 
-def api_download(token: str, url: str, dest: Path):
+def api_download(token: str, url: str, dest: Path) -> int | None:
     """Download a file from a Buildkite artifact URL.
 
+    Returns the number of lines in the file (counted while it streams to
+    disk, for the summary) or None if the download failed. The file is
+    written under a temporary name and renamed into place once complete, so
+    a failed download never leaves a truncated file behind.
+
     Buildkite's download_url returns a 302 redirect to a presigned storage URL.
     We must NOT forward the Authorization header to the storage backend (it
-    rejects it with 400), so we manually follow the redirect.
+    rejects it with 400), so we manually follow the redirect. The first,
+    authenticated hop goes over this thread's API connection; http.client
+    never follows redirects on its own.
     """
-    import urllib.request
-
-    class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
-        def redirect_request(self, req, fp, code, msg, headers, newurl):
-            return None  # Don't follow redirects automatically
-
-    opener = urllib.request.build_opener(NoRedirectHandler)
-    req = Request(url, headers={"Authorization": f"Bearer {token}"})
-    try:
-        opener.open(req)
-    except urllib.error.HTTPError as e:
-        if e.code in (301, 302, 303, 307, 308):
-            # Follow the redirect without the auth header
-            redirect_url = e.headers.get("Location")
-            if redirect_url:
-                dest.parent.mkdir(parents=True, exist_ok=True)
-                with urlopen(redirect_url) as resp:
-                    dest.write_bytes(resp.read())
-                return
-        print(f"  Download failed ({e.code}): {dest.name}", file=sys.stderr)
-        return
-
-    # If no redirect (shouldn't happen), try direct download
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    req2 = Request(url, headers={"Authorization": f"Bearer {token}"})
+    parts = urlsplit(url)
+    tmp = dest.with_name(f"{dest.name}.part")
     try:
-        with urlopen(req2) as resp:
-            dest.write_bytes(resp.read())
+        path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        resp, body = _api_request(token, path)
+        redirect_url = resp.getheader("Location")
+
+        if resp.status in (301, 302, 303, 307, 308) and redirect_url:
+            # Follow the redirect without the auth header, streaming to disk so
+            # large artifacts never sit in memory whole
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            newlines = 0
+            last = b""
+            with urlopen(redirect_url) as storage_resp, tmp.open("wb") as f:
+                while chunk := storage_resp.read(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    newlines += chunk.count(b"\n")
+                    last = chunk[-1:]
+                # read(n) just returns b"" if the connection drops early, so
+                # check nothing is still owed against Content-Length
+                if storage_resp.length:
+                    raise http.client.IncompleteRead(b"", storage_resp.length)
+        elif resp.status == 200:
+            # If no redirect (shouldn't happen), the body is the artifact itself
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(body)
+            newlines = body.count(b"\n")
+            last = body[-1:]
+        else:
+            print(f"  Download failed ({resp.status}): {dest.name}", file=sys.stderr)
+            return None
+        os.replace(tmp, dest)
     except HTTPError as e:
         print(f"  Download failed ({e.code}): {dest.name}", file=sys.stderr)
+        return None
+    except (URLError, OSError, http.client.HTTPException) as e:
+        # Connection reset, timeout or a body cut short mid-stream
+        print(f"  Download failed ({e}): {dest.name}", file=sys.stderr)
+        return None
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    # A final line without a trailing newline still counts
+    return newlines + (last not in (b"", b"\n"))
+
+
+def git_output(*args: str) -> str:
+    """Run git with args and return its stripped stdout.
+
+    Raises CalledProcessError on failure and FileNotFoundError if git isn't
+    installed.
+    """
+    result = subprocess.run(
+        ["git", *args],
+        capture_output=True, text=True, check=True,
+    )
+    return result.stdout.strip()
 
 
 def resolve_commit(ref: str) -> str:
     """Resolve a git ref (like HEAD, branch name) to a full SHA."""
+    if FULL_SHA_RE.fullmatch(ref):
+        return ref  # already resolved; no need to spawn git
     try:
-        result = subprocess.run(
-            ["git", "rev-parse", ref],
-            capture_output=True, text=True, check=True,
-        )
-        return result.stdout.strip()
+        return git_output("rev-parse", ref)
     except (subprocess.CalledProcessError, FileNotFoundError):
         # If git isn't available or ref isn't valid, use the input as-is
         return ref
 
 
 def find_build(token: str, org: str, pipeline: str, commit: str) -> dict | None:
-    builds = api_get(token, f"/organizations/{org}/pipelines/{pipeline}/builds?commit={commit}")
+    # Only the newest build's number and URL are used, so skip the per-build
+    # job and pipeline objects that make up most of the response
+    query = f"commit={commit}&per_page=1&exclude_jobs=true&exclude_pipeline=true"
+    builds = api_get(token, f"/organizations/{org}/pipelines/{pipeline}/builds?{query}")
     if builds:
         return builds[0]
     return None
 
 
+def poll_delay(unchanged_polls: int, max_interval: float) -> float:
+    """Seconds to sleep before the next poll, after unchanged_polls in a row.
+
+    Doubles from MIN_POLL_INTERVAL up to max_interval, with +/-20% jitter so
+    several monitors started together don't poll in lockstep. Jitter never
+    takes it past max_interval.
+    """
+    delay = min(max_interval, MIN_POLL_INTERVAL * 2 ** min(unchanged_polls, 16))
+    return min(max_interval, delay * random.uniform(0.8, 1.2))
+
+
 def wait_for_build(token: str, org: str, pipeline: str, commit: str,
                    poll_interval: int, timeout: int) -> dict:
     short = commit[:10]
     print(f"Looking for build with commit {short}...")
 
     start = time.time()
+    attempt = 0
     while time.time() - start < timeout:
         build = find_build(token, org, pipeline, commit)
         if build:
             return build
         elapsed = int(time.time() - start)
-        print(f"  No build found yet ({elapsed}s elapsed), retrying in {poll_interval}s...")
-        time.sleep(poll_interval)
+        delay = poll_delay(attempt, poll_interval)
+        print(f"  No build found yet ({elapsed}s elapsed), retrying in {delay:.0f}s...")
+        time.sleep(delay)
+        attempt += 1
 
     print(f"Error: No build found for commit {short} after {timeout}s.", file=sys.stderr)
     print("Has the commit been pushed and the pipeline triggered?", file=sys.stderr)
@@ -138,13 +269,26 @@ def wait_for_build(token: str, org: str, pipeline: str, commit: str,
 
 def strip_html(text: str) -> str:
     """Strip HTML tags and decode entities from Buildkite log output."""
-    text = re.sub(r"<time[^>]*>[^<]*</time>", "", text)
-    text = re.sub(r"<[^>]+>", "", text)
-    text = html.unescape(text)
-    return text
+    # Plain-text logs skip the regex scan (html.unescape has its own "&" check)
+    if "<" in text:
+        text = HTML_MARKUP_RE.sub("", text)
+    return html.unescape(text)
+
 
+def get_job_log(token: str, org: str, pipeline: str, build_number: int, job_id: str,
+                cache_dir: Path | None = None) -> str:
+    """Fetch a job's log as plain text.
+
+    A finished job's log never changes, so with cache_dir the text is kept
+    there as <job_id>.log and re-running the monitor reads it back instead.
+    """
+    cached = cache_dir / f"{job_id}.log" if cache_dir else None
+    if cached:
+        try:
+            return cached.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            pass
 
-def get_job_log(token: str, org: str, pipeline: str, build_number: int, job_id: str) -> str:
     log = api_get(token, f"/organizations/{org}/pipelines/{pipeline}/builds/{build_number}/jobs/{job_id}/log")
     if log is None:
         return "(no log available)"
@@ -152,7 +296,15 @@ def get_job_log(token: str, org: str, pipeline: str, build_number: int, job_id:
         content = log.get("content", "(empty log)")
     else:
         content = log
-    return strip_html(content)
+    content = strip_html(content)
+
+    if cached:
+        # Write then rename, so an interrupted run never leaves a partial log
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_name(f"{cached.name}.tmp")
+        tmp.write_text(content, encoding="utf-8")
+        os.replace(tmp, cached)
+    return content
 
 
 def format_duration(seconds: float) -> str:
@@ -162,20 +314,27 @@ def format_duration(seconds: float) -> str:
     return f"{s}s"
 
 
+_STATE_SYMBOLS = {
+    "passed": "\033[32m✓\033[0m",
+    "failed": "\033[31m✗\033[0m",
+    "running": "\033[33m●\033[0m",
+    "scheduled": "○",
+    "waiting": "○",
+    "blocked": "◉",
+    "canceled": "\033[31m⊘\033[0m",
+    "canceling": "\033[31m⊘\033[0m",
+    "skipped": "\033[90m–\033[0m",
+    "not_run": "\033[90m–\033[0m",
+}
+
+
 def state_symbol(state: str) -> str:
-    symbols = {
-        "passed": "\033[32m✓\033[0m",
-        "failed": "\033[31m✗\033[0m",
-        "running": "\033[33m●\033[0m",
-        "scheduled": "○",
-        "waiting": "○",
-        "blocked": "◉",
-        "canceled": "\033[31m⊘\033[0m",
-        "canceling": "\033[31m⊘\033[0m",
-        "skipped": "\033[90m–\033[0m",
-        "not_run": "\033[90m–\033[0m",
-    }
-    return symbols.get(state, "?")
+    return _STATE_SYMBOLS.get(state, "?")
+
+
+def script_jobs(build: dict) -> list[dict]:
+    """The build's command-step jobs (waiters, triggers and blocks have no logs)."""
+    return [job for job in build.get("jobs", []) if job.get("type") == "script"]
 
 
 def print_build_status(build: dict):
@@ -185,9 +344,7 @@ def print_build_status(build: dict):
     sym = state_symbol(state)
     print(f"\n  Build #{number} {sym} {state}  {url}")
 
-    for job in build.get("jobs", []):
-        if job.get("type") != "script":
-            continue
+    for job in script_jobs(build):
         name = job.get("name", job.get("id", "?"))
         jstate = job.get("state", "unknown")
         jsym = state_symbol(jstate)
@@ -213,37 +370,46 @@ def download_artifacts(token: str, org: str, pipeline: str, build: dict, logs_di
         print("\nNo artifacts to download (only build.tar.gz found).")
         return
 
-    logs_dir.mkdir(parents=True, exist_ok=True)
-    print(f"\nDownloading {len(artifacts)} artifact(s) to {logs_dir}/")
-
-    for artifact in artifacts:
-        filename = artifact.get("filename", "unknown")
-        download_url = artifact.get("download_url")
-        file_size = artifact.get("file_size", 0)
+    # Artifacts from different jobs can share a filename and would race on the
+    # same file below, so only the last one listed (the one a sequential
+    # download kept) is fetched
+    downloadable = list({
+        a.get("filename", "unknown"): a for a in artifacts if a.get("download_url")
+    }.values())
 
-        if not download_url:
-            continue
-
-        dest = logs_dir / filename
-        api_download(token, download_url, dest)
-
-        size_str = f"{file_size:,}" if file_size else "0"
-        print(f"  {filename} ({size_str} bytes)")
-
-    # Print a quick summary of text artifacts
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    print(f"\nDownloading {len(downloadable)} artifact(s) to {logs_dir}/")
+
+    # Downloads are independent and latency-bound, so run them concurrently
+    # and report each one in artifact order as it completes
+    workers = max(1, min(ARTIFACT_DOWNLOAD_WORKERS, len(downloadable)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        done = pool.map(
+            lambda a: api_download(
+                token, a["download_url"], logs_dir / a.get("filename", "unknown"),
+            ),
+            downloadable,
+        )
+        line_counts = {}
+        for artifact, lines in zip(downloadable, done):
+            filename = artifact.get("filename", "unknown")
+            file_size = artifact.get("file_size", 0)
+            if lines is not None:
+                line_counts[filename] = lines
+
+            size_str = f"{file_size:,}" if file_size else "0"
+            print(f"  {filename} ({size_str} bytes)")
+
+    # Print a quick summary of text artifacts, using the line counts taken
+    # during download rather than reading the files back
     print()
-    for artifact in artifacts:
-        filename = artifact.get("filename", "")
-        dest = logs_dir / filename
-        if dest.exists() and dest.suffix in (".jsonl", ".txt", ".log", ".xml"):
-            size = dest.stat().st_size
-            if size == 0:
+    for filename, lines in line_counts.items():
+        if Path(filename).suffix in (".jsonl", ".txt", ".log", ".xml"):
+            if lines == 0:
                 print(f"  \033[33m{filename}: empty (0 bytes)\033[0m")
             elif filename.endswith(".jsonl"):
-                lines = dest.read_text().strip().count("\n") + 1 if size > 0 else 0
                 print(f"  {filename}: {lines} event(s)")
             elif filename.endswith(".txt") and "timeline" in filename:
-                lines = dest.read_text().strip().count("\n") + 1 if size > 0 else 0
                 print(f"  {filename}: {lines} line(s)")
 
 
@@ -254,10 +420,12 @@ def monitor(token: str, org: str, pipeline: str, commit: str,
     url = build.get("web_url", "")
 
     print(f"\nFound build #{build_number}: {url}")
-    print(f"Polling every {poll_interval}s until complete...\n")
+    print(f"Polling every {MIN_POLL_INTERVAL}-{poll_interval}s until complete...\n")
 
     terminal_states = {"passed", "failed", "canceled", "not_run"}
     last_state = None
+    last_progress = None
+    unchanged_polls = 0
 
     while True:
         build = api_get(token, f"/organizations/{org}/pipelines/{pipeline}/builds/{build_number}")
@@ -270,7 +438,17 @@ def monitor(token: str, org: str, pipeline: str, commit: str,
         if state in terminal_states:
             break
 
-        time.sleep(poll_interval)
+        # Poll quickly again right after any build or job state change, and
+        # back off while the build is just running
+        progress = (state, [job.get("state") for job in build.get("jobs", [])])
+        if progress != last_progress:
+            last_progress = progress
+            unchanged_polls = 0
+        else:
+            unchanged_polls += 1
+        time.sleep(poll_delay(unchanged_polls, poll_interval))
+
+    build_logs_dir = logs_dir / str(build_number)
 
     # Final summary
     print(f"\n{'='*60}")
@@ -279,7 +457,7 @@ def monitor(token: str, org: str, pipeline: str, commit: str,
     elif state == "failed":
         print(f"\033[31mBuild #{build_number} failed.\033[0m")
         print(f"\nFetching logs for failed jobs...\n")
-        print_failed_logs(token, org, pipeline, build)
+        print_failed_logs(token, org, pipeline, build, build_logs_dir)
     elif state == "canceled":
         print(f"Build #{build_number} was canceled.")
     else:
@@ -287,30 +465,32 @@ def monitor(token: str, org: str, pipeline: str, commit: str,
     print(f"{'='*60}")
 
     # Download artifacts
-    build_logs_dir = logs_dir / str(build_number)
     download_artifacts(token, org, pipeline, build, build_logs_dir)
 
     return 0 if state == "passed" else 1
 
 
-def print_failed_logs(token: str, org: str, pipeline: str, build: dict):
+def print_failed_logs(token: str, org: str, pipeline: str, build: dict, logs_dir: Path):
     build_number = build["number"]
-    for job in build.get("jobs", []):
-        if job.get("type") != "script":
-            continue
-        if job.get("state") != "failed":
-            continue
+    failed_jobs = [job for job in script_jobs(build) if job.get("state") == "failed"]
+    if not failed_jobs:
+        return
 
-        name = job.get("name", job.get("id", "?"))
-        job_id = job["id"]
+    # Fetch all logs concurrently, then print them in job order
+    with ThreadPoolExecutor(max_workers=min(LOG_FETCH_WORKERS, len(failed_jobs))) as pool:
+        logs = pool.map(
+            lambda job: get_job_log(token, org, pipeline, build_number, job["id"], logs_dir),
+            failed_jobs,
+        )
+        for job, log in zip(failed_jobs, logs):
+            name = job.get("name", job.get("id", "?"))
 
-        print(f"{'─'*60}")
-        print(f"Job: {name}")
-        print(f"{'─'*60}")
+            print(f"{'─'*60}")
+            print(f"Job: {name}")
+            print(f"{'─'*60}")
 
-        log = get_job_log(token, org, pipeline, build_number, job_id)
-        print(log)
-        print()
+            print(log)
+            print()
 
 
 def main():
@@ -331,7 +511,9 @@ def main():
     )
     parser.add_argument(
         "--poll-interval", type=int, default=DEFAULT_POLL_INTERVAL,
-        help=f"Seconds between status checks (default: {DEFAULT_POLL_INTERVAL})",
+        help=f"Maximum seconds between status checks; polling starts every "
+             f"{MIN_POLL_INTERVAL}s and backs off while nothing changes "
+             f"(default: {DEFAULT_POLL_INTERVAL})",
     )
     parser.add_argument(
         "--timeout", type=int, default=DEFAULT_BUILD_WAIT_TIMEOUT,
@@ -344,24 +526,37 @@ def main():
     args = parser.parse_args()
 
     token = get_token()
-    commit = resolve_commit(args.commit)
+    commit = None
+    logs_dir = args.logs_dir
+    if logs_dir is None and not FULL_SHA_RE.fullmatch(args.commit):
+        # The usual `monitor_build.py HEAD` needs both the SHA and the repo
+        # root; one rev-parse prints both, saving a second git process
+        try:
+            out = git_output("rev-parse", "--show-toplevel", args.commit)
+            repo_root, commit = out.split("\n")
+            logs_dir = Path(repo_root) / ".logs"
+        except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+            pass  # fall back to resolving each separately below
+    if commit is None:
+        commit = resolve_commit(args.commit)
     print(f"Monitoring build for commit {commit[:10]}...")
 
     # Default logs dir: .logs/ in the git repo root
-    if args.logs_dir:
-        logs_dir = args.logs_dir
-    else:
+    if logs_dir is None:
         try:
-            repo_root = subprocess.run(
-                ["git", "rev-parse", "--show-toplevel"],
-                capture_output=True, text=True, check=True,
-            ).stdout.strip()
+            repo_root = git_output("rev-parse", "--show-toplevel")
             logs_dir = Path(repo_root) / ".logs"
         except (subprocess.CalledProcessError, FileNotFoundError):
             logs_dir = Path(".logs")
 
-    exit_code = monitor(token, args.org, args.pipeline, commit,
-                        args.poll_interval, args.timeout, logs_dir)
+    try:
+        exit_code = monitor(token, args.org, args.pipeline, commit,
+                            args.poll_interval, args.timeout, logs_dir)
+    except KeyboardInterrupt:
+        # Ctrl-C already interrupts a poll sleep or API read immediately;
+        # just exit like a shell would instead of dumping a traceback
+        print("\nInterrupted.", file=sys.stderr)
+        sys.exit(130)
     sys.exit(exit_code)
 
 